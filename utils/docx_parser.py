@@ -4,6 +4,7 @@ import os
 import sys
 import traceback
 import json
+import pickle
 import re
 import hashlib
 from datetime import datetime
@@ -1705,7 +1706,15 @@ def campaign_main(contacts_root, scheduled_root, tracking_root, alerts_email,
         
         # ===== LOAD CONTACTS =====
         print("Loading contacts for validation...\n")
-        if DATA_LOADER_AVAILABLE:
+        preloaded_contacts = kwargs.get('preloaded_contacts')
+        if preloaded_contacts is not None:
+            # Already parsed by the caller (integrated_runner) and piped in
+            all_contacts = list(preloaded_contacts)
+            if all_contacts and DATA_LOADER_AVAILABLE:
+                stats, all_contacts = validate_contact_data(all_contacts)
+            original_contact_count = len(all_contacts)
+            print(f"✅ Using {original_contact_count} preloaded contacts for validation")
+        elif DATA_LOADER_AVAILABLE:
             all_contacts = load_contacts_directory(contacts_root)
             if all_contacts:
                 stats, all_contacts = validate_contact_data(all_contacts)
@@ -2476,6 +2485,8 @@ if __name__ == "__main__":
     # === OPTIONAL CORE ARGUMENTS ===
     parser.add_argument("--feedback", help="Feedback email address")
     parser.add_argument("--templates", help="Templates directory (alias for scheduled)")
+    parser.add_argument("--contacts-stdin", action="store_true",
+                       help="Read already-loaded contacts (pickled list) from stdin")
     
     # === CAMPAIGN CONTROL ===
     parser.add_argument("--template-file", help="Specific template file to process")
@@ -2543,6 +2554,14 @@ if __name__ == "__main__":
     # Handle templates alias
     scheduled_path = args.templates if args.templates else args.scheduled
     
+    # Contacts already loaded by the caller skip the directory reload
+    preloaded_contacts = None
+    if args.contacts_stdin:
+        try:
+            preloaded_contacts = pickle.load(sys.stdin.buffer)
+        except Exception as e:
+            print(f"⚠️  Could not read contacts from stdin, reloading from {args.contacts}: {e}")
+    
     # Display all parsed arguments
     print(f"\nArguments parsed successfully:")
     print(f"  --contacts: {args.contacts}")
@@ -2581,7 +2600,8 @@ if __name__ == "__main__":
             per_domain_limit=args.per_domain_limit,
             suppression_file=args.suppression_file,
             batch_size=args.batch_size,
-            delay=args.delay
+            delay=args.delay,
+            preloaded_contacts=preloaded_contacts
         )
         print("\n✅ Domain-aware campaign system completed successfully")
         sys.exit(0)
@@ -3,15 +3,30 @@
 Fix corrupted DOCX files by regenerating them from scratch
 """
 
+import os
+import re
 import sys
+import shutil
+import hashlib
+import zipfile
+from io import BytesIO
 from pathlib import Path
 from docx import Document
 from docx.shared import Pt, Inches
 from datetime import datetime
 
-def create_valid_docx(filepath, content=None):
+# Serialized DOCX bytes keyed by SHA-256 of the content they were built from
+_docx_cache = {}
+
+def create_valid_docx(filepath, content=None, log=print):
     """Create a new valid DOCX file"""
     try:
+        key = 'default' if content is None else hashlib.sha256(content.encode('utf-8')).hexdigest()
+        if key in _docx_cache:
+            Path(filepath).write_bytes(_docx_cache[key])
+            log(f"✅ Created valid DOCX: {filepath}")
+            return True
+        
         # Create a new document
         doc = Document()
         
@@ -51,31 +66,59 @@ def create_valid_docx(filepath, content=None):
             for line in content.split('\n'):
                 doc.add_paragraph(line)
         
-        # Save the document
-        doc.save(str(filepath))
-        print(f"✅ Created valid DOCX: {filepath}")
+        # Save the document once to memory so identical templates reuse the bytes
+        buf = BytesIO()
+        doc.save(buf)
+        _docx_cache[key] = buf.getvalue()
+        Path(filepath).write_bytes(_docx_cache[key])
+        log(f"✅ Created valid DOCX: {filepath}")
         return True
         
     except Exception as e:
-        print(f"❌ Error creating {filepath}: {e}")
+        log(f"❌ Error creating {filepath}: {e}")
         return False
 
-def backup_file(filepath):
+def backup_file(filepath, log=print, ts=None):
     """Create a backup of the file"""
     if filepath.exists():
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_path = filepath.with_suffix(f'.corrupted_{timestamp}.bak')
+        timestamp = ts or datetime.now().strftime('%Y%m%d_%H%M%S')
+        backup_path = filepath.parent / f'{filepath.stem}.corrupted_{timestamp}.bak'
         try:
-            filepath.rename(backup_path)
-            print(f"📦 Backed up corrupted file to: {backup_path}")
+            try:
+                os.replace(filepath, backup_path)
+            except OSError:
+                # e.g. EXDEV on bind mounts / overlay filesystems
+                shutil.move(str(filepath), str(backup_path))
+            log(f"📦 Backed up corrupted file to: {backup_path}")
             return True
         except Exception as e:
-            print(f"⚠️  Could not backup {filepath}: {e}")
+            log(f"⚠️  Could not backup {filepath}: {e}")
             return False
     return False
 
-def fix_corrupted_docx_files(directory):
-    """Find and fix all corrupted DOCX files in directory"""
+_BACKUP_NAME_RE = re.compile(r'\.(?:backup|corrupted)_')
+
+def _iter_docx(directory):
+    """Yield DOCX files under directory, leaving out backup copies"""
+    for root, _dirs, names in os.walk(directory):
+        for name in names:
+            if name.endswith('.docx') and not _BACKUP_NAME_RE.search(name):
+                yield Path(root) / name
+
+def _is_valid_docx(filepath):
+    """Cheap validity probe: readable ZIP containing word/document.xml"""
+    try:
+        with zipfile.ZipFile(filepath) as z:
+            return 'word/document.xml' in z.namelist()
+    except (zipfile.BadZipFile, OSError):
+        return False
+
+def fix_corrupted_docx_files(directory, deep_check=False):
+    """Find and fix all corrupted DOCX files in directory.
+
+    Files are checked with a ZIP central-directory probe; pass
+    deep_check=True to also load each one with python-docx.
+    """
     directory = Path(directory)
     
     if not directory.exists():
@@ -85,7 +128,7 @@ def fix_corrupted_docx_files(directory):
     print(f"🔍 Scanning {directory} for DOCX files...")
     print()
     
-    docx_files = list(directory.rglob('*.docx'))
+    docx_files = list(_iter_docx(directory))
     
     if not docx_files:
         print("No DOCX files found")
@@ -96,41 +139,43 @@ def fix_corrupted_docx_files(directory):
     
     corrupted_count = 0
     fixed_count = 0
+    # One timestamp for every backup made in this run
+    run_ts = datetime.now().strftime('%Y%m%d_%H%M%S')
     
     for docx_file in docx_files:
-        # Skip backup files
-        if '.backup_' in docx_file.name or '.corrupted_' in docx_file.name:
-            print(f"⏭️  Skipping backup file: {docx_file.name}")
-            continue
-        
-        print(f"Checking: {docx_file}")
+        # Collect this file's messages and write them in one call
+        lines = [f"Checking: {docx_file}"]
+        log = lines.append
         
         # Try to open the file
         try:
-            doc = Document(str(docx_file))
-            print(f"  ✅ Valid DOCX file")
+            if not _is_valid_docx(docx_file):
+                raise ValueError("not a ZIP archive with word/document.xml")
+            if deep_check:
+                Document(str(docx_file))
+            log(f"  ✅ Valid DOCX file")
         except Exception as e:
-            print(f"  ❌ Corrupted: {e}")
+            log(f"  ❌ Corrupted: {e}")
             corrupted_count += 1
             
-            # Backup the corrupted file
-            backup_file(docx_file)
-            
-            # Try to extract any text content from the file
+            # Peek at the head of the file for diagnostics only; the content
+            # is never reused, so there is no point reading the whole file
             try:
-                with open(docx_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    # Look for any readable text
-                    if len(content) > 0:
-                        print(f"  📝 Attempting to preserve content from corrupted file...")
-            except:
-                content = None
+                with open(docx_file, 'rb') as f:
+                    head = f.read(4096)
+                if head.lstrip().startswith(b'<'):
+                    log(f"  📝 Corrupted file looks like raw XML/text")
+            except OSError:
+                pass
+            
+            # Backup the corrupted file
+            backup_file(docx_file, log=log, ts=run_ts)
             
             # Create a new valid DOCX file
-            if create_valid_docx(docx_file, content=None):
+            if create_valid_docx(docx_file, content=None, log=log):
                 fixed_count += 1
         
-        print()
+        sys.stdout.write('\n'.join(lines) + '\n\n')
     
     print("=" * 50)
     print(f"📊 Summary:")
@@ -142,11 +187,13 @@ def fix_corrupted_docx_files(directory):
     return corrupted_count == 0 or fixed_count == corrupted_count
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print("Usage: python fix_corrupted_docx.py <directory>")
+    deep_check = '--deep' in sys.argv[1:]
+    args = [a for a in sys.argv[1:] if a != '--deep']
+    if len(args) < 1:
+        print("Usage: python fix_corrupted_docx.py [--deep] <directory>")
         print("Example: python fix_corrupted_docx.py campaign-templates/")
         sys.exit(1)
     
-    directory = sys.argv[1]
-    success = fix_corrupted_docx_files(directory)
+    directory = args[0]
+    success = fix_corrupted_docx_files(directory, deep_check=deep_check)
     sys.exit(0 if success else 1)
@@ -1,34 +1,79 @@
-from ruamel.yaml import YAML
+import io
 import sys
+import yaml
+from pathlib import Path
 
-def fix_indentation(input_file, output_file=None):
-    yaml = YAML()
-    yaml.preserve_quotes = True
-    yaml.indent(mapping=2, sequence=4, offset=2)
+try:
+    from yaml import CSafeLoader as _Loader, CSafeDumper as _Dumper
+except ImportError:
+    from yaml import SafeLoader as _Loader, SafeDumper as _Dumper
+
+
+_YAML = None
+
+
+def _ruamel_yaml():
+    # ruamel is only needed when comments/quotes must survive the round trip;
+    # the configured instance is built once and reused across calls
+    global _YAML
+    if _YAML is None:
+        from ruamel.yaml import YAML
+        _YAML = YAML()
+        _YAML.preserve_quotes = True
+        _YAML.indent(mapping=2, sequence=4, offset=2)
+    return _YAML
+
+
+def _dump(data, stream, ryaml=None):
+    if ryaml is not None:
+        ryaml.dump(data, stream)
+    else:
+        yaml.dump(data, stream, Dumper=_Dumper, indent=2, default_flow_style=False,
+                  sort_keys=False, allow_unicode=True)
+
+
+def fix_indentation(input_file, output_file=None, preserve_comments=False):
+    ryaml = _ruamel_yaml() if preserve_comments else None
 
     try:
-        with open(input_file, 'r') as f:
-            data = yaml.load(f)
+        # Both loaders accept byte streams and decode UTF-8 internally
+        with open(input_file, 'rb', buffering=1 << 20) as f:
+            data = ryaml.load(f) if ryaml is not None else yaml.load(f, Loader=_Loader)
 
         if data is None:
             print("The file is empty or invalid.")
             return
 
         if output_file:
-            with open(output_file, 'w') as f:
-                yaml.dump(data, f)
+            buf = io.StringIO()
+            _dump(data, buf, ryaml)
+            formatted = buf.getvalue().encode('utf-8')
+
+            # Leave an already well-formatted file (and its mtime) untouched
+            try:
+                current = Path(output_file).read_bytes()
+            except OSError:
+                current = None
+            if current == formatted:
+                print(f"Already well-formatted, skipping write: {output_file}")
+                return
+
+            with open(output_file, 'wb') as f:
+                f.write(formatted)
             print(f"Corrected YAML written to: {output_file}")
         else:
-            yaml.dump(data, sys.stdout)
+            _dump(data, sys.stdout, ryaml)
 
     except Exception as e:
         print(f"\n❌ Failed to parse and fix YAML.\nError: {e}")
         print("\nTIP: Try validating the file with a linter like `yamllint` to locate exact issues.")
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python fix_yaml_indentation.py <input_file> [output_file]")
+    preserve_comments = "--preserve-comments" in sys.argv[1:]
+    args = [a for a in sys.argv[1:] if a != "--preserve-comments"]
+    if len(args) < 1:
+        print("Usage: python fix_yaml_indentation.py [--preserve-comments] <input_file> [output_file]")
     else:
-        input_file = sys.argv[1]
-        output_file = sys.argv[2] if len(sys.argv) > 2 else None
-        fix_indentation(input_file, output_file)
+        input_file = args[0]
+        output_file = args[1] if len(args) > 1 else None
+        fix_indentation(input_file, output_file, preserve_comments)
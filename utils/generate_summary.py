@@ -4,16 +4,28 @@ generate_summary.py - Enhanced with Google Sheets Contact Display (Fixed for Git
 
 Generates a markdown summary for email campaigns (DRY-RUN or LIVE)
 Now includes actual Google Sheets contact data processing and display with fallback support
+
+Environment:
+    SHEETS_CACHE_DIR  Directory for cached sheet CSV exports (default: .cache/sheets)
+    SHEETS_CACHE_TTL  Seconds a cached export is served without contacting Google
+                      (default: 0, always revalidate with If-Modified-Since)
 """
 
 import argparse
+import asyncio
+import io
 import os
 import sys
 import re
 import json
+import time
+import tempfile
+import email.utils
 import urllib.request
 import urllib.error
 import csv
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
@@ -25,6 +37,50 @@ except ImportError:
     REQUESTS_AVAILABLE = False
     print("Info: Using urllib fallback instead of requests")
 
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+# Log-parsing patterns, compiled once. Metric alternatives share one regex;
+# each named group maps back to the metric it feeds.
+_METRIC_PATTERNS = [
+    (r"(?:Total\s+)?contacts?\s+loaded[:\s]*(?P<total_contacts_a>\d+)", "total_contacts"),
+    (r"(?:Total\s+)?(?P<total_contacts_b>\d+)\s+contacts?\s+loaded", "total_contacts"),
+    (r"unique\s+contacts[:\s]*(?P<unique_contacts>\d+)", "unique_contacts"),
+    (r"campaigns?\s+processed[:\s]*(?P<campaigns_processed_a>\d+)", "campaigns_processed"),
+    (r"processed[:\s]*(?P<campaigns_processed_b>\d+)\s+campaigns?", "campaigns_processed"),
+    (r"(?:total\s+)?emails?[:\s]*(?P<total_emails>\d+)", "total_emails"),
+    (r"successful[:\s]*(?P<successful_a>\d+)", "successful"),
+    (r"sent[:\s]*(?P<successful_b>\d+)", "successful"),
+    (r"failed[:\s]*(?P<failed>\d+)", "failed"),
+]
+METRIC_RE = re.compile("|".join(pattern for pattern, _ in _METRIC_PATTERNS), re.I)
+_METRIC_GROUPS = {
+    group: metric_key
+    for pattern, metric_key in _METRIC_PATTERNS
+    for group in re.compile(pattern).groupindex
+}
+CAMPAIGN_RE = re.compile("|".join([
+    r"Campaign[:\s]+([^,\n\:]+?)(?:\s+(?:completed|processed|sent|finished))",
+    r"Processing\s+campaign[:\s]+([^,\n\:]+)",
+    r"=== CAMPAIGN[:\s]+([^=]+) ===",
+]), re.I)
+TS_RE = re.compile(r'(\d{4}-\d{2}-\d{2}[T\s]\d{2}:\d{2}:\d{2})')
+EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+# Contact validation (fullmatch); unlike EMAIL_RE, no word boundaries, so a
+# local part may start with '+', '.', '-' or '%'
+VALID_EMAIL_RE = re.compile(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}')
+LEVEL_RE = re.compile(r"(?=.*?(?P<error>ERROR|Error|CRITICAL|FATAL))|(?=.*?(?P<warning>WARNING|Warning|WARN))")
+
+_SHEET_ID_RE = re.compile(r'/d/([a-zA-Z0-9-_]+)')
+_GID_RE = re.compile(r'gid=([0-9]+)')
+
+# Translation tables for per-row string cleanup of sheet data
+_DOT_TO_SPACE = str.maketrans({'.': ' '})
+_HEADER_CLEAN = str.maketrans({' ': '_', '-': '_'})
+
 def parse_args():
     parser = argparse.ArgumentParser(description="Generate campaign summary from log files")
     parser.add_argument("--log-file", type=str, required=True,
@@ -46,190 +102,380 @@ class GoogleSheetsParser:
     
     def __init__(self):
         self.timeout = 15
+        self.cache_dir = Path(os.getenv("SHEETS_CACHE_DIR", ".cache/sheets"))
+        self.cache_ttl = int(os.getenv("SHEETS_CACHE_TTL", "0"))
         if REQUESTS_AVAILABLE:
             import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
             self.session = requests.Session()
             self.session.headers.update({
-                'User-Agent': 'Mozilla/5.0 (compatible; EmailCampaignSystem/1.0)'
+                'User-Agent': 'Mozilla/5.0 (compatible; EmailCampaignSystem/1.0)',
+                'Connection': 'keep-alive'
             })
+            # One pooled adapter so every sheet fetch reuses the TLS connection
+            retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+            self.session.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry))
         else:
             self.session = None
     
     def parse_url_file(self, url_file_path):
         """Parse .url file and extract Google Sheets data"""
+        csv_url = self.extract_csv_url(url_file_path)
+        return self.fetch_and_parse(csv_url) if csv_url else []
+    
+    def extract_csv_url(self, url_file_path):
+        """Read a .url file and return its Google Sheets CSV export URL (no network I/O)"""
         try:
             with open(url_file_path, 'r', encoding='utf-8') as f:
                 url = f.read().strip()
             
             if 'docs.google.com/spreadsheets' in url:
-                return self.fetch_google_sheets_data(url)
+                return self.csv_export_url(url)
             else:
                 print(f"Non-Google Sheets URL found in {url_file_path}: {url}")
-                return []
+                return None
                 
         except Exception as e:
             print(f"Error parsing URL file {url_file_path}: {str(e)}")
-            return []
+            return None
+    
+    def csv_export_url(self, url):
+        """Convert a Google Sheets viewing URL to its CSV export URL (None if not possible)"""
+        if '/edit' not in url and '/d/' not in url:
+            return None
+        
+        sheet_id_match = _SHEET_ID_RE.search(url)
+        if not sheet_id_match:
+            print(f"Could not extract sheet ID from URL: {url}")
+            return None
+        
+        sheet_id = sheet_id_match.group(1)
+        gid = '0'  # Default sheet
+        
+        # Extract gid if present
+        if 'gid=' in url:
+            gid_match = _GID_RE.search(url)
+            if gid_match:
+                gid = gid_match.group(1)
+        
+        return f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}"
+    
+    def cache_path(self, csv_url):
+        """On-disk cache file for a CSV export URL, keyed by (sheet_id, gid)"""
+        match = re.search(r'/d/([a-zA-Z0-9-_]+)/export\?format=csv&gid=([0-9]+)', csv_url)
+        if not match:
+            return None
+        return self.cache_dir / f"{match.group(1)}_{match.group(2)}.csv"
+    
+    def load_cached_csv(self, csv_url):
+        """Return (content, is_fresh, mtime) for a cached sheet, or (None, False, None)"""
+        path = self.cache_path(csv_url)
+        if path is None:
+            return None, False, None
+        try:
+            mtime = path.stat().st_mtime
+            content = path.read_text(encoding='utf-8')
+        except OSError:
+            return None, False, None
+        return content, time.time() - mtime < self.cache_ttl, mtime
+    
+    def save_cached_csv(self, csv_url, csv_content):
+        """Atomically store a fetched sheet in the on-disk cache"""
+        path = self.cache_path(csv_url)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(csv_content)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not cache Google Sheets data: {e}")
+    
+    def touch_cached_csv(self, csv_url):
+        """Mark a cached sheet as fresh again after an HTTP 304"""
+        try:
+            os.utime(self.cache_path(csv_url))
+        except (OSError, TypeError):
+            pass
+    
+    @staticmethod
+    def conditional_headers(cached_mtime):
+        """If-Modified-Since header for revalidating a stale cache entry"""
+        if cached_mtime is None:
+            return {}
+        return {'If-Modified-Since': email.utils.formatdate(cached_mtime, usegmt=True)}
+    
+    async def fetch_all(self, csv_urls, max_concurrency=8):
+        """Concurrently fetch CSV bodies for csv_urls (requires aiohttp).
+        
+        Returns a list aligned with csv_urls; failed fetches are None.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        headers = {'User-Agent': 'Mozilla/5.0 (compatible; EmailCampaignSystem/1.0)'}
+        
+        connector = aiohttp.TCPConnector(limit=16)
+        async with aiohttp.ClientSession(headers=headers, timeout=timeout, connector=connector) as session:
+            async def fetch(csv_url):
+                cached, fresh, cached_mtime = self.load_cached_csv(csv_url)
+                if fresh:
+                    print(f"Using cached Google Sheets data for: {csv_url}")
+                    return cached
+                
+                async with semaphore:
+                    print(f"Fetching Google Sheets data from: {csv_url}")
+                    async with session.get(csv_url, headers=self.conditional_headers(cached_mtime)) as response:
+                        if response.status == 200:
+                            csv_content = await response.text(encoding='utf-8')
+                            self.save_cached_csv(csv_url, csv_content)
+                            return csv_content
+                        if response.status == 304 and cached is not None:
+                            print(f"Google Sheets data not modified, using cache for: {csv_url}")
+                            self.touch_cached_csv(csv_url)
+                            return cached
+                        # Returning without reading leaves the error page body undownloaded
+                        if response.status == 403:
+                            print("ERROR: Google Sheets access denied. Sheet may be private.")
+                            print("Ensure sheet is shared with 'Anyone with the link can view'")
+                        else:
+                            print(f"ERROR: Failed to fetch Google Sheets via aiohttp (HTTP {response.status})")
+                        return None
+            
+            results = await asyncio.gather(*(fetch(u) for u in csv_urls), return_exceptions=True)
+        
+        bodies = []
+        for csv_url, result in zip(csv_urls, results):
+            if isinstance(result, Exception):
+                print(f"aiohttp fetch failed for {csv_url}: {result}")
+                result = None
+            bodies.append(result)
+        return bodies
+    
+    def stream_to_cache(self, csv_url, lines):
+        """Yield CSV lines while spooling them into the on-disk cache.
+        
+        The cache entry is only replaced once the whole stream has been read.
+        Caching is best-effort: if the cache cannot be written, the lines are
+        still yielded uncached.
+        """
+        path = self.cache_path(csv_url)
+        if path is None:
+            yield from lines
+            return
+        
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        except OSError as e:
+            print(f"Warning: Could not cache Google Sheets data: {e}")
+            yield from lines
+            return
+        
+        cache_file = os.fdopen(fd, 'w', encoding='utf-8', newline='')
+        completed = False
+        try:
+            for line in lines:
+                if cache_file is not None:
+                    try:
+                        cache_file.write(line)
+                    except OSError as e:
+                        print(f"Warning: Could not cache Google Sheets data: {e}")
+                        try:
+                            cache_file.close()
+                        except OSError:
+                            pass
+                        cache_file = None
+                yield line
+            completed = cache_file is not None
+        finally:
+            if cache_file is not None:
+                try:
+                    cache_file.close()
+                except OSError as e:
+                    print(f"Warning: Could not cache Google Sheets data: {e}")
+                    completed = False
+            try:
+                if completed:
+                    os.replace(tmp_path, path)
+                else:
+                    os.unlink(tmp_path)
+            except OSError as e:
+                print(f"Warning: Could not cache Google Sheets data: {e}")
     
     def fetch_google_sheets_data(self, url):
         """Fetch actual data from Google Sheets URL with fallback methods"""
+        # Convert viewing URL to CSV export URL
+        csv_url = self.csv_export_url(url)
+        return self.fetch_and_parse(csv_url) if csv_url else []
+    
+    def fetch_and_parse(self, csv_url):
+        """Fetch a CSV export URL (cache, requests, then urllib) and parse its contacts"""
         contacts = []
         
         try:
-            # Convert viewing URL to CSV export URL
-            if '/edit' in url or '/d/' in url:
-                sheet_id_match = re.search(r'/d/([a-zA-Z0-9-_]+)', url)
-                if not sheet_id_match:
-                    print(f"Could not extract sheet ID from URL: {url}")
-                    return contacts
-                
-                sheet_id = sheet_id_match.group(1)
-                gid = '0'  # Default sheet
-                
-                # Extract gid if present
-                if 'gid=' in url:
-                    gid_match = re.search(r'gid=([0-9]+)', url)
-                    if gid_match:
-                        gid = gid_match.group(1)
-                
-                csv_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}"
-                
+            # Serve from the on-disk cache while it is within the TTL
+            cached, fresh, cached_mtime = self.load_cached_csv(csv_url)
+            conditional = self.conditional_headers(cached_mtime)
+            csv_content = None  # full CSV text, or a stream of CSV lines
+            response = None
+            access_denied = False
+            
+            if fresh:
+                csv_content = cached
+                print(f"Using cached Google Sheets data for: {csv_url}")
+            else:
                 print(f"Fetching Google Sheets data from: {csv_url}")
-                
-                # Try requests first, then urllib fallback
-                csv_content = None
-                
-                if REQUESTS_AVAILABLE and self.session:
-                    try:
-                        response = self.session.get(csv_url, timeout=self.timeout)
-                        if response.status_code == 200:
-                            csv_content = response.text
-                            print(f"Successfully fetched via requests (HTTP {response.status_code})")
-                        elif response.status_code == 403:
+            
+            # Try requests first, then urllib fallback
+            if csv_content is None and REQUESTS_AVAILABLE and self.session:
+                try:
+                    response = self.session.get(csv_url, timeout=self.timeout, headers=conditional, stream=True)
+                    status = response.status_code
+                    if status == 200:
+                        # Rows are parsed as they arrive rather than buffering the body.
+                        # newline='' leaves line endings to the csv module, as for urllib
+                        # auto_close off: urllib3 would otherwise close the raw stream at
+                        # EOF, before TextIOWrapper has seen the end of it
+                        response.raw.decode_content = True
+                        response.raw.auto_close = False
+                        csv_content = self.stream_to_cache(
+                            csv_url, io.TextIOWrapper(response.raw, encoding='utf-8', newline=''))
+                        print(f"Successfully fetched via requests (HTTP {status})")
+                    else:
+                        # Streamed, so closing here skips downloading the error page body
+                        response.close()
+                        response = None
+                        if status == 304 and cached is not None:
+                            csv_content = cached
+                            self.touch_cached_csv(csv_url)
+                            print("Google Sheets data not modified (HTTP 304), using cache")
+                        elif status == 403:
+                            access_denied = True
                             print("ERROR: Google Sheets access denied. Sheet may be private.")
                             print("Ensure sheet is shared with 'Anyone with the link can view'")
                         else:
-                            print(f"ERROR: Failed to fetch Google Sheets via requests (HTTP {response.status_code})")
-                    except Exception as e:
-                        print(f"Requests method failed: {e}, trying urllib fallback...")
-                
-                # urllib fallback
-                if csv_content is None:
-                    try:
-                        with urllib.request.urlopen(csv_url, timeout=self.timeout) as response:
-                            if response.status == 200:
-                                csv_content = response.read().decode('utf-8')
-                                print(f"Successfully fetched via urllib (HTTP {response.status})")
-                            elif response.status == 403:
-                                print("ERROR: Google Sheets access denied. Sheet may be private.")
-                                print("Ensure sheet is shared with 'Anyone with the link can view'")
-                            else:
-                                print(f"ERROR: Failed to fetch Google Sheets via urllib (HTTP {response.status})")
-                    except urllib.error.HTTPError as e:
-                        if e.code == 403:
-                            print("ERROR: Google Sheets access denied (urllib). Check sharing settings.")
-                        else:
-                            print(f"ERROR: urllib HTTP error {e.code}")
-                    except Exception as e:
-                        print(f"urllib method also failed: {e}")
-                
-                # Parse CSV content if we got it
+                            print(f"ERROR: Failed to fetch Google Sheets via requests (HTTP {status})")
+                except Exception as e:
+                    print(f"Requests method failed: {e}, trying urllib fallback...")
+            
+            # urllib fallback (pointless for a private sheet, it would get 403 again)
+            if csv_content is None and not access_denied:
+                try:
+                    request = urllib.request.Request(csv_url, headers=conditional)
+                    response = urllib.request.urlopen(request, timeout=self.timeout)
+                    if response.status == 200:
+                        csv_content = self.stream_to_cache(
+                            csv_url, io.TextIOWrapper(response, encoding='utf-8', newline=''))
+                        print(f"Successfully fetched via urllib (HTTP {response.status})")
+                    else:
+                        print(f"ERROR: Failed to fetch Google Sheets via urllib (HTTP {response.status})")
+                except urllib.error.HTTPError as e:
+                    e.close()  # never read the error body
+                    if e.code == 304 and cached is not None:
+                        csv_content = cached
+                        self.touch_cached_csv(csv_url)
+                        print("Google Sheets data not modified (HTTP 304), using cache")
+                    elif e.code == 403:
+                        print("ERROR: Google Sheets access denied (urllib). Check sharing settings.")
+                    else:
+                        print(f"ERROR: urllib HTTP error {e.code}")
+                except Exception as e:
+                    print(f"urllib method also failed: {e}")
+            
+            # Parse CSV content if we got it
+            try:
                 if csv_content:
                     contacts = self.parse_csv_content(csv_content)
                     print(f"Successfully parsed {len(contacts)} contacts from Google Sheets")
                 else:
                     print("Failed to fetch Google Sheets data with all methods")
-                
+            finally:
+                if response is not None:
+                    response.close()
+            
         except Exception as e:
             print(f"Error fetching Google Sheets data: {str(e)}")
             
         return contacts
     
     def parse_csv_content(self, csv_content):
-        """Parse CSV content and extract contact information with robust error handling"""
+        """Parse CSV content and extract contact information with robust error handling
+        
+        csv_content may be the full CSV text or an iterable of CSV lines.
+        """
         contacts = []
         
         try:
-            lines = csv_content.strip().split('\n')
-            
-            if len(lines) < 2:
-                print("Warning: Google Sheets appears to have no data rows")
-                return contacts
-                
-            # Use csv module for proper parsing
-            csv_reader = csv.reader(lines)
+            if isinstance(csv_content, str):
+                csv_content = io.StringIO(csv_content.strip())
+            reader = csv.DictReader(csv_content)
             
             # Get header row
-            try:
-                headers = next(csv_reader)
-                headers = [h.strip().lower() for h in headers]
-            except StopIteration:
+            if not reader.fieldnames:
                 print("Warning: No header row found in CSV data")
                 return contacts
+            headers = [h.strip().lower() for h in reader.fieldnames]
+            reader.fieldnames = headers
             
             # Find important columns
-            email_col = None
-            name_col = None
-            company_col = None
+            email_key = None
+            name_key = None
+            company_key = None
             
-            for i, header in enumerate(headers):
+            for header in headers:
                 if any(keyword in header for keyword in ['email', 'e-mail', 'mail']):
-                    email_col = i
+                    email_key = header
                 elif any(keyword in header for keyword in ['name', 'contact', 'person']):
-                    name_col = i
+                    name_key = header
                 elif any(keyword in header for keyword in ['company', 'organization', 'org']):
-                    company_col = i
+                    company_key = header
             
-            if email_col is None:
+            if email_key is None:
                 print("Warning: No email column found in Google Sheets data")
                 print(f"Available headers: {headers}")
                 return contacts
             
+            # Clean the names of the remaining columns once, not per row
+            extra_keys = {
+                header: header.translate(_HEADER_CLEAN)
+                for header in headers
+                if header not in (email_key, name_key, company_key)
+            }
+            
             # Parse data rows
-            row_num = 2  # Start from 2 (1 is header)
-            for row in csv_reader:
-                try:
-                    if len(row) <= email_col:
-                        continue
+            row_count = 0
+            for row in reader:
+                row_count += 1
+                email = (row.get(email_key) or "").strip()
+                
+                if self.is_valid_email(email):
+                    # Extract name, falling back to the email username
+                    name = (row.get(name_key) or "").strip() if name_key else ""
+                    if not name:
+                        name = email.split('@', 1)[0].translate(_DOT_TO_SPACE).title()
                     
-                    email = row[email_col].strip() if row[email_col] else ""
+                    contact = {
+                        'email': email,
+                        'name': name,
+                        'company': (row.get(company_key) or "").strip() if company_key else "",
+                        'domain': email.split('@')[1],
+                        'row': reader.line_num,
+                        'source': 'Google Sheets'
+                    }
                     
-                    if self.is_valid_email(email):
-                        # Extract name
-                        name = ""
-                        if name_col is not None and len(row) > name_col and row[name_col]:
-                            name = row[name_col].strip()
-                        else:
-                            # Fallback: use email username as name
-                            name = email.split('@')[0].replace('.', ' ').title()
-                        
-                        # Extract company
-                        company = ""
-                        if company_col is not None and len(row) > company_col and row[company_col]:
-                            company = row[company_col].strip()
-                        
-                        contact = {
-                            'email': email,
-                            'name': name,
-                            'company': company,
-                            'domain': email.split('@')[1],
-                            'row': row_num,
-                            'source': 'Google Sheets'
-                        }
-                        
-                        # Add additional fields
-                        for i, value in enumerate(row):
-                            if i < len(headers) and i not in [email_col, name_col, company_col] and value and value.strip():
-                                clean_header = headers[i].replace(' ', '_').replace('-', '_')
-                                contact[clean_header] = value.strip()
-                        
-                        contacts.append(contact)
-                        
-                except Exception as e:
-                    print(f"Error parsing row {row_num}: {str(e)}")
-                    continue
-                finally:
-                    row_num += 1
+                    # Add additional fields
+                    for header, clean_header in extra_keys.items():
+                        value = row.get(header)
+                        if value and value.strip():
+                            contact[clean_header] = value.strip()
+                    
+                    contacts.append(contact)
+            
+            if row_count == 0:
+                print("Warning: Google Sheets appears to have no data rows")
             
         except Exception as e:
             print(f"Error parsing CSV content: {str(e)}")
@@ -240,8 +486,36 @@ class GoogleSheetsParser:
         """Validate email format"""
         if not email or not isinstance(email, str):
             return False
-        pattern = r'^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}$'
-        return re.match(pattern, email) is not None
+        return VALID_EMAIL_RE.fullmatch(email) is not None
+
+def _line_timestamp(line):
+    """Return the first timestamp in line, checking the usual line-start position first"""
+    # Most log lines begin with "YYYY-MM-DD[T ]HH:MM:SS"; check that slice without the regex
+    if (len(line) >= 19 and line[4] == '-' and line[7] == '-' and line[10] in ('T', ' ')
+            and line[13] == ':' and line[16] == ':'):
+        head = line[:19]
+        if (head[:4] + head[5:7] + head[8:10] + head[11:13] + head[14:16] + head[17:19]).isdecimal():
+            return head
+    timestamp_match = TS_RE.search(line)
+    return timestamp_match.group(1) if timestamp_match else None
+
+def _last_timestamp(log_file, block_size=64 * 1024):
+    """Return the timestamp of the last log line that has one, reading the file backwards"""
+    with open(log_file, 'rb') as f:
+        pos = f.seek(0, os.SEEK_END)
+        carry = b''
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            lines = (f.read(step) + carry).split(b'\n')
+            # The first piece may be the tail of a line that starts in the previous block
+            carry = lines.pop(0) if pos > 0 else b''
+            for raw in reversed(lines):
+                timestamp = _line_timestamp(raw.decode('utf-8', errors='replace'))
+                if timestamp:
+                    return timestamp
+    return None
 
 def extract_metrics(log_file):
     """Extract campaign metrics from log file with improved parsing"""
@@ -256,7 +530,7 @@ def extract_metrics(log_file):
         "sample_recipients": [],
         "errors": [],
         "warnings": [],
-        "domains": set(),
+        "domains": Counter(),
         "execution_time": None,
         "start_time": None,
         "end_time": None
@@ -267,78 +541,64 @@ def extract_metrics(log_file):
         return metrics
 
     try:
-        with open(log_file, "r", encoding='utf-8') as f:
-            content = f.read()
-            lines = content.splitlines()
-
-        for line in lines:
-            line = line.strip()
+        levels_saturated = False
+        seen_campaigns = set()  # membership index for the ordered campaigns list
+        
+        # Iterate the file object so only one line is held in memory at a time
+        with open(log_file, "r", encoding='utf-8', buffering=1024 * 1024) as f:
+            for line in f:
+                line = line.strip()
             
-            # Extract timestamps
-            timestamp_match = re.search(r'(\d{4}-\d{2}-\d{2}[T\s]\d{2}:\d{2}:\d{2})', line)
-            if timestamp_match:
+                # Extract the first timestamp; the last one is read from the tail below
                 if not metrics["start_time"]:
-                    metrics["start_time"] = timestamp_match.group(1)
-                metrics["end_time"] = timestamp_match.group(1)
-            
-            # Extract various metrics with multiple patterns
-            patterns = [
-                (r"(?:Total\s+)?contacts?\s+loaded[:\s]*(\d+)", "total_contacts"),
-                (r"(?:Total\s+)?(\d+)\s+contacts?\s+loaded", "total_contacts"),
-                (r"unique\s+contacts[:\s]*(\d+)", "unique_contacts"),
-                (r"campaigns?\s+processed[:\s]*(\d+)", "campaigns_processed"),
-                (r"processed[:\s]*(\d+)\s+campaigns?", "campaigns_processed"),
-                (r"(?:total\s+)?emails?[:\s]*(\d+)", "total_emails"),
-                (r"successful[:\s]*(\d+)", "successful"),
-                (r"sent[:\s]*(\d+)", "successful"),
-                (r"failed[:\s]*(\d+)", "failed"),
-            ]
+                    metrics["start_time"] = _line_timestamp(line)
             
-            for pattern, metric_key in patterns:
-                match = re.search(pattern, line, re.I)
-                if match:
+                # Extract various metrics in a single scan of the line
+                for match in METRIC_RE.finditer(line):
+                    metric_key = _METRIC_GROUPS[match.lastgroup]
                     try:
-                        value = int(match.group(1))
+                        value = int(match.group(match.lastgroup))
                         metrics[metric_key] = max(metrics[metric_key], value)  # Take the highest value found
                     except ValueError:
                         continue
             
-            # Extract campaign names
-            campaign_patterns = [
-                r"Campaign[:\s]+([^,\n\:]+?)(?:\s+(?:completed|processed|sent|finished))",
-                r"Processing\s+campaign[:\s]+([^,\n\:]+)",
-                r"=== CAMPAIGN[:\s]+([^=]+) ===",
-            ]
-            
-            for pattern in campaign_patterns:
-                match = re.search(pattern, line, re.I)
-                if match:
-                    campaign_name = match.group(1).strip()
-                    if campaign_name and campaign_name not in metrics["campaigns"]:
+                # Extract campaign names
+                for match in CAMPAIGN_RE.finditer(line):
+                    campaign_name = next(g for g in match.groups() if g is not None).strip()
+                    if campaign_name and campaign_name not in seen_campaigns:
+                        seen_campaigns.add(campaign_name)
                         metrics["campaigns"].append(campaign_name)
             
-            # Extract email addresses and domains
-            email_matches = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', line)
-            for email in email_matches:
-                domain = email.split('@')[1].lower()
-                metrics["domains"].add(domain)
-                if len(metrics["sample_recipients"]) < 10:
-                    metrics["sample_recipients"].append(email)
+                # Extract email addresses and domains ('@' test is a cheap prefilter)
+                email_matches = EMAIL_RE.findall(line) if '@' in line else ()
+                for email in email_matches:
+                    domain = email.split('@')[1].lower()
+                    metrics["domains"][domain] += 1
+                    if len(metrics["sample_recipients"]) < 10:
+                        metrics["sample_recipients"].append(email)
             
-            # Categorize messages
-            if re.search(r"ERROR|Error|CRITICAL|FATAL", line):
-                if len(metrics["errors"]) < 10:  # Limit error collection
-                    metrics["errors"].append(line)
-            elif re.search(r"WARNING|Warning|WARN", line):
-                if len(metrics["warnings"]) < 10:
-                    metrics["warnings"].append(line)
+                # Categorize messages (errors take precedence over warnings);
+                # skipped once both samples are full since nothing can change
+                if levels_saturated:
+                    continue
+                level_match = LEVEL_RE.match(line)
+                if level_match and level_match.group("error") is not None:
+                    if len(metrics["errors"]) < 10:  # Limit error collection
+                        metrics["errors"].append(line)
+                elif level_match:
+                    if len(metrics["warnings"]) < 10:
+                        metrics["warnings"].append(line)
+                levels_saturated = len(metrics["errors"]) >= 10 and len(metrics["warnings"]) >= 10
 
+        if metrics["start_time"]:
+            metrics["end_time"] = _last_timestamp(log_file)
+        
         # Calculate execution time if we have start and end
         if metrics["start_time"] and metrics["end_time"]:
             try:
-                from datetime import datetime
-                start = datetime.fromisoformat(metrics["start_time"].replace('T', ' '))
-                end = datetime.fromisoformat(metrics["end_time"].replace('T', ' '))
+                # fromisoformat accepts either 'T' or ' ' as the separator
+                start = datetime.fromisoformat(metrics["start_time"])
+                end = datetime.fromisoformat(metrics["end_time"])
                 duration = end - start
                 metrics["execution_time"] = str(duration)
             except:
@@ -349,6 +609,57 @@ def extract_metrics(log_file):
 
     return metrics
 
+def _fetch_csv_urls_concurrently(parser, url_files, csv_urls, wave_size=8):
+    """Fetch resolved sheets with aiohttp in concurrent waves, yielding (url_file, contacts) in url_files order.
+    
+    A sheet aiohttp could not fetch falls back to the requests/urllib fetcher.
+    Closing the generator early stops further waves from being scheduled.
+    """
+    for start in range(0, len(url_files), wave_size):
+        wave = url_files[start:start + wave_size]
+        pending = [url_file for url_file in wave if url_file in csv_urls]
+        bodies = {}
+        if pending:
+            fetched = asyncio.run(parser.fetch_all([csv_urls[url_file] for url_file in pending],
+                                                   max_concurrency=wave_size))
+            bodies = dict(zip(pending, fetched))
+        
+        for url_file in wave:
+            if url_file not in csv_urls:
+                yield url_file, []
+                continue
+            body = bodies[url_file]
+            if body:
+                contacts = parser.parse_csv_content(body)
+                print(f"Successfully parsed {len(contacts)} contacts from Google Sheets")
+            else:
+                print(f"aiohttp could not fetch {url_file}, falling back to requests/urllib")
+                contacts = parser.fetch_and_parse(csv_urls[url_file])
+            yield url_file, contacts
+
+def _fetch_csv_urls_threaded(parser, url_files, csv_urls):
+    """Fetch resolved sheets on a thread pool, yielding (url_file, contacts) in url_files order.
+    
+    Closing the generator early cancels fetches that have not started yet.
+    """
+    if not csv_urls:
+        for url_file in url_files:
+            yield url_file, []
+        return
+    
+    with ThreadPoolExecutor(max_workers=min(16, len(csv_urls))) as executor:
+        futures = {
+            url_file: executor.submit(parser.fetch_and_parse, csv_url)
+            for url_file, csv_url in csv_urls.items()
+        }
+        try:
+            for url_file in url_files:
+                future = futures.get(url_file)
+                yield url_file, future.result() if future is not None else []
+        finally:
+            for future in futures.values():
+                future.cancel()
+
 def load_actual_contacts(contacts_dir, max_display=10):
     """Load actual contacts from Google Sheets URLs in contacts directory"""
     actual_contacts = []
@@ -372,12 +683,22 @@ def load_actual_contacts(contacts_dir, max_display=10):
     
     print(f"Found {len(url_files)} .url files in contacts directory")
     
+    # Resolve every .url file to its CSV export URL before any network I/O
+    csv_urls = {}
     for url_file in url_files:
-        url_path = os.path.join(contacts_dir, url_file)
+        csv_url = parser.extract_csv_url(os.path.join(contacts_dir, url_file))
+        if csv_url:
+            csv_urls[url_file] = csv_url
+    
+    if AIOHTTP_AVAILABLE:
+        results = _fetch_csv_urls_concurrently(parser, url_files, csv_urls)
+    else:
+        results = _fetch_csv_urls_threaded(parser, url_files, csv_urls)
+    
+    for url_file, contacts in results:
         print(f"Processing: {url_file}")
         
         try:
-            contacts = parser.parse_url_file(url_path)
             if contacts:
                 for contact in contacts[:max_display]:  # Limit per file
                     contact['source_file'] = url_file
@@ -399,152 +720,153 @@ def load_actual_contacts(contacts_dir, max_display=10):
 
 def build_summary(metrics, mode, actual_contacts=None):
     """Build comprehensive summary with actual contact data"""
-    md = []
+    buf = io.StringIO()
+    w = buf.write
     timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')
     
     # Title with clear mode indication
     mode_emoji = "🔄" if mode == "dry-run" else "📧"
     mode_text = "DRY-RUN - No emails sent" if mode == "dry-run" else "LIVE - Emails sent"
     
-    md.append(f"## {mode_emoji} Email Campaign Execution Report")
-    md.append(f"**Generated:** {timestamp}")
-    md.append(f"**Mode:** {mode_text}")
-    md.append("")
+    w(f"## {mode_emoji} Email Campaign Execution Report\n")
+    w(f"**Generated:** {timestamp}\n")
+    w(f"**Mode:** {mode_text}\n")
+    w("\n")
 
     # Execution statistics
-    md.append("### 📊 Execution Statistics")
-    md.append("")
-    md.append("| Metric | Value |")
-    md.append("|--------|-------|")
-    md.append(f"| Total Contacts Loaded | {metrics['total_contacts']} |")
+    w("### 📊 Execution Statistics\n")
+    w("\n")
+    w("| Metric | Value |\n")
+    w("|--------|-------|\n")
+    w(f"| Total Contacts Loaded | {metrics['total_contacts']} |\n")
     
     if metrics['unique_contacts'] > 0:
-        md.append(f"| Unique Contacts | {metrics['unique_contacts']} |")
+        w(f"| Unique Contacts | {metrics['unique_contacts']} |\n")
     
-    md.append(f"| Campaigns Processed | {metrics['campaigns_processed']} |")
-    md.append(f"| Total Emails | {metrics['total_emails']} |")
-    md.append(f"| Successful | {metrics['successful']} |")
-    md.append(f"| Failed | {metrics['failed']} |")
+    w(f"| Campaigns Processed | {metrics['campaigns_processed']} |\n")
+    w(f"| Total Emails | {metrics['total_emails']} |\n")
+    w(f"| Successful | {metrics['successful']} |\n")
+    w(f"| Failed | {metrics['failed']} |\n")
     
     success_rate = "N/A"
     if metrics['total_emails'] > 0:
         rate = (metrics['successful'] / metrics['total_emails'] * 100)
         success_rate = f"{rate:.1f}%"
-    md.append(f"| Success Rate | {success_rate} |")
-    md.append(f"| Unique Domains | {len(metrics['domains'])} |")
+    w(f"| Success Rate | {success_rate} |\n")
+    w(f"| Unique Domains | {len(metrics['domains'])} |\n")
     
     if metrics['execution_time']:
-        md.append(f"| Execution Time | {metrics['execution_time']} |")
+        w(f"| Execution Time | {metrics['execution_time']} |\n")
     
-    md.append("")
+    w("\n")
 
     # Actual Google Sheets Contacts
     if actual_contacts:
-        md.append("### 👥 Actual Google Sheets Contacts (Sample)")
-        md.append("")
-        md.append("| Name | Email | Domain | Company | Source |")
-        md.append("|------|-------|--------|---------|--------|")
+        w("### 👥 Actual Google Sheets Contacts (Sample)\n")
+        w("\n")
+        w("| Name | Email | Domain | Company | Source |\n")
+        w("|------|-------|--------|---------|--------|\n")
         
+        row = "| {name} | {email} | {domain} | {company} | {source} |\n".format
         for contact in actual_contacts:
-            name = contact.get('name', 'N/A')
             email = contact.get('email', 'N/A')
-            domain = contact.get('domain', email.split('@')[1] if '@' in email else 'N/A')
-            company = contact.get('company', 'N/A')
-            source = contact.get('source_file', 'Unknown')
-            
-            md.append(f"| {name} | {email} | {domain} | {company} | {source} |")
+            w(row(
+                name=contact.get('name', 'N/A'),
+                email=email,
+                domain=contact.get('domain', email.split('@')[1] if '@' in email else 'N/A'),
+                company=contact.get('company', 'N/A'),
+                source=contact.get('source_file', 'Unknown'),
+            ))
         
-        md.append("")
-        md.append(f"**✅ Real Data Confirmation:** Showing {len(actual_contacts)} actual contacts from Google Sheets. This is LIVE DATA, not mock data.")
-        md.append("")
+        w("\n")
+        w(f"**✅ Real Data Confirmation:** Showing {len(actual_contacts)} actual contacts from Google Sheets. This is LIVE DATA, not mock data.\n")
+        w("\n")
 
     else:
-        md.append("### ⚠️ Contact Data Status")
-        md.append("")
-        md.append("No real contact data was loaded from Google Sheets. Possible reasons:")
-        md.append("- No .url files found in contacts directory")
-        md.append("- Google Sheets not accessible (check sharing settings)")  
-        md.append("- Network connectivity issues")
-        md.append("")
+        w("### ⚠️ Contact Data Status\n")
+        w("\n")
+        w("No real contact data was loaded from Google Sheets. Possible reasons:\n")
+        w("- No .url files found in contacts directory\n")
+        w("- Google Sheets not accessible (check sharing settings)\n")
+        w("- Network connectivity issues\n")
+        w("\n")
 
     # Campaign Details
     if metrics["campaigns"]:
-        md.append("### 📋 Campaign Details")
-        md.append("")
-        md.append("| Campaign | Status | Details |")
-        md.append("|----------|--------|---------|")
+        w("### 📋 Campaign Details\n")
+        w("\n")
+        w("| Campaign | Status | Details |\n")
+        w("|----------|--------|---------|\n")
         for campaign in metrics["campaigns"]:
             status = "✅ Completed" if mode == "live" else "🔄 Simulated"
-            md.append(f"| {campaign} | {status} | See execution logs |")
-        md.append("")
+            w(f"| {campaign} | {status} | See execution logs |\n")
+        w("\n")
 
     # Domain Distribution
     if metrics["domains"]:
-        md.append("### 🌐 Email Domains Found")
-        md.append("")
-        domain_list = list(metrics["domains"])[:15]  # Show top 15
-        md.append("```")
+        w("### 🌐 Email Domains Found\n")
+        w("\n")
+        domain_list = [domain for domain, _ in metrics["domains"].most_common(15)]  # Show top 15
+        w("```\n")
         for domain in sorted(domain_list):
-            md.append(f"• {domain}")
+            w(f"• {domain}\n")
         if len(metrics["domains"]) > 15:
-            md.append(f"... and {len(metrics['domains']) - 15} more domains")
-        md.append("```")
-        md.append("")
+            w(f"... and {len(metrics['domains']) - 15} more domains\n")
+        w("```\n")
+        w("\n")
 
     # Sample Recipients from Logs
     if metrics["sample_recipients"]:
-        md.append("### 📧 Sample Recipients (From Logs)")
-        md.append("")
-        md.append("```")
+        w("### 📧 Sample Recipients (From Logs)\n")
+        w("\n")
+        w("```\n")
         for recipient in metrics["sample_recipients"][:8]:
-            md.append(recipient)
+            w(f"{recipient}\n")
         if len(metrics["sample_recipients"]) > 8:
-            md.append(f"... and {len(metrics['sample_recipients']) - 8} more")
-        md.append("```")
-        md.append("")
+            w(f"... and {len(metrics['sample_recipients']) - 8} more\n")
+        w("```\n")
+        w("\n")
 
     # Issues and warnings
     if metrics["errors"]:
-        md.append("### ❌ Errors Detected")
-        md.append("")
-        md.append("```")
+        w("### ❌ Errors Detected\n")
+        w("\n")
+        w("```\n")
         for error in metrics["errors"][:5]:  # Show first 5 errors
-            md.append(error)
+            w(f"{error}\n")
         if len(metrics["errors"]) > 5:
-            md.append(f"... and {len(metrics['errors']) - 5} more errors")
-        md.append("```")
-        md.append("")
+            w(f"... and {len(metrics['errors']) - 5} more errors\n")
+        w("```\n")
+        w("\n")
 
     if metrics["warnings"]:
-        md.append("### ⚠️ Warnings")
-        md.append("")
-        md.append("```")
+        w("### ⚠️ Warnings\n")
+        w("\n")
+        w("```\n")
         for warning in metrics["warnings"][:3]:  # Show first 3 warnings
-            md.append(warning)
+            w(f"{warning}\n")
         if len(metrics["warnings"]) > 3:
-            md.append(f"... and {len(metrics['warnings']) - 3} more warnings")
-        md.append("```")
-        md.append("")
+            w(f"... and {len(metrics['warnings']) - 3} more warnings\n")
+        w("```\n")
+        w("\n")
 
     # Metadata
-    md.append("### 🔧 Execution Metadata")
-    md.append("")
-    md.append("| Field | Value |")
-    md.append("|-------|-------|")
-    md.append(f"| Timestamp | {timestamp} |")
-    md.append(f"| Mode | {mode.upper()} |")
-    md.append(f"| Data Source | {'Real Google Sheets Data' if actual_contacts else 'Log File Only'} |")
-    md.append(f"| Contact Sources | {len(actual_contacts) if actual_contacts else 0} contacts from Google Sheets |")
-    md.append(f"| Script Version | Enhanced with Google Sheets Integration + GitHub Actions Compatible |")
+    w("### 🔧 Execution Metadata\n")
+    w("\n")
+    w("| Field | Value |\n")
+    w("|-------|-------|\n")
+    w(f"| Timestamp | {timestamp} |\n")
+    w(f"| Mode | {mode.upper()} |\n")
+    w(f"| Data Source | {'Real Google Sheets Data' if actual_contacts else 'Log File Only'} |\n")
+    w(f"| Contact Sources | {len(actual_contacts) if actual_contacts else 0} contacts from Google Sheets |\n")
+    w(f"| Script Version | Enhanced with Google Sheets Integration + GitHub Actions Compatible |\n")
     
     if metrics['start_time']:
-        md.append(f"| Execution Started | {metrics['start_time']} |")
+        w(f"| Execution Started | {metrics['start_time']} |\n")
     if metrics['end_time']:
-        md.append(f"| Execution Completed | {metrics['end_time']} |")
-    
-    md.append("")
+        w(f"| Execution Completed | {metrics['end_time']} |\n")
     
-    return "\n".join(md)
+    return buf.getvalue()
 
 def main():
     args = parse_args()
@@ -581,8 +903,8 @@ def main():
             output_path = Path(args.output_summary)
             output_path.parent.mkdir(parents=True, exist_ok=True)
             
-            with open(args.output_summary, "w", encoding='utf-8') as f:
-                f.write(summary + "\n")
+            # Encode once and hand the bytes to a single write
+            output_path.write_bytes((summary + "\n").encode("utf-8"))
             print(f"✅ Summary written to {args.output_summary}")
         except Exception as e:
             print(f"❌ Error writing to {args.output_summary}: {str(e)}")
@@ -12,39 +12,109 @@ Fixes empty campaign content issues and provides robust campaign execution
 
 import os
 import sys
+import io
+import re
+import csv
 import json
+import atexit
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-import traceback
+from time import strftime
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Add utils to path
 sys.path.insert(0, 'utils')
 
+
+def _dumps(obj):
+    """Serialize obj as indented JSON bytes, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode()
+
+PLACEHOLDER_RE = re.compile(r'\{\{(\w+)\}\}')
+PERSONALIZATION_RE = re.compile(r'\{\{(?:name|email)\}\}')
+REQUIRED_CAMPAIGN_FIELDS = ('name', 'template_content')
+
+
+def tokenize_template(text):
+    """Split a template once into (text, field) segments; field is None for literals"""
+    parts = PLACEHOLDER_RE.split(text)
+    # re.split alternates literal, captured field name, literal, ...
+    return [(part, None) if i % 2 == 0 else (f"{{{{{part}}}}}", part)
+            for i, part in enumerate(parts) if part]
+
+
+def render_segments(segments, contact):
+    """Fill tokenized segments from contact; unknown placeholders are left as-is"""
+    return ''.join(text if field is None else str(contact.get(field, text))
+                   for text, field in segments)
+
+
+@dataclass(slots=True, eq=False)
 class EnhancedGitHubAdapter:
     """Enhanced adapter to run email campaigns in GitHub Actions environment"""
     
-    def __init__(self):
-        self.is_github_actions = os.getenv('GITHUB_ACTIONS') is not None
-        self.dry_run = True  # Always dry run in GitHub Actions
+    REPORT_LOG_ENTRIES = 20  # log tail kept in memory for the execution report
+    
+    is_github_actions: bool = field(default_factory=lambda: os.getenv('GITHUB_ACTIONS') is not None)
+    dry_run: bool = True  # Always dry run in GitHub Actions
+    execution_log: deque = field(init=False, repr=False)
+    subject_segments: list = field(default=None, init=False, repr=False)
+    body_segments: list = field(default=None, init=False, repr=False)
+    _log_fh: io.TextIOWrapper = field(init=False, repr=False)
+    _pending: list = field(default_factory=list, init=False, repr=False)  # entries not yet printed to stdout
+    # Artifacts are written once and shared by both execution paths
+    _campaign_cache: tuple = field(default=None, init=False, repr=False)
+    _contacts_cache: list = field(default=None, init=False, repr=False)
+    
+    def __post_init__(self):
+        # Entries are streamed to logs/execution.log as they are logged;
+        # only the tail is kept in memory for the execution report. The
+        # file is truncated here so it holds this run's entries only, and
+        # block-buffered; the atexit close flushes the tail.
+        Path('logs').mkdir(exist_ok=True)
+        self._log_fh = open('logs/execution.log', 'w')
+        atexit.register(self._log_fh.close)
+        self.execution_log = deque(maxlen=self.REPORT_LOG_ENTRIES)
         self.setup_directories()
-        self.execution_log = []
     
     def log(self, message):
-        """Log messages with timestamp"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        """Log messages with timestamp (console output is buffered until flush_logs)"""
+        timestamp = strftime("%H:%M:%S")
         log_entry = f"[{timestamp}] {message}"
-        print(log_entry)
+        self._log_fh.write(log_entry + '\n')
         self.execution_log.append(log_entry)
+        self._pending.append(log_entry)
+    
+    def flush_logs(self):
+        """Print buffered log entries in one write"""
+        if self._pending:
+            sys.stdout.write('\n'.join(self._pending) + '\n')
+            sys.stdout.flush()
+            self._pending.clear()
     
     def setup_directories(self):
         """Ensure all required directories exist"""
         directories = ['templates', 'contacts', 'scheduled-campaigns', 'tracking', 'logs', 'campaign-templates']
         for directory in directories:
-            Path(directory).mkdir(exist_ok=True)
-            self.log(f"✅ Directory ready: {directory}")
+            path = Path(directory)
+            if path.is_dir():
+                continue
+            path.mkdir(parents=True, exist_ok=True)
+            self.log(f"✅ Directory created: {directory}")
     
     def create_complete_campaign_config(self):
         """Create a complete campaign configuration with all required fields"""
+        if self._campaign_cache is not None:
+            return self._campaign_cache
         
         # Create email template content
         template_content = """Subject: Welcome to Our Platform - Hello {{name}}!
@@ -71,8 +141,7 @@ This email was sent to {{email}}. If you no longer wish to receive these emails,
         
         # Save template file
         template_file = 'campaign-templates/welcome_template.txt'
-        with open(template_file, 'w') as f:
-            f.write(template_content)
+        Path(template_file).write_text(template_content)
         self.log(f"✅ Created template: {template_file}")
         
         # Create comprehensive campaign config
@@ -112,14 +181,17 @@ This email was sent to {{email}}. If you no longer wish to receive these emails,
         
         # Save campaign config
         campaign_file = 'scheduled-campaigns/github_test_campaign.json'
-        with open(campaign_file, 'w') as f:
-            json.dump(config, f, indent=2)
+        Path(campaign_file).write_bytes(_dumps(config))
         
         self.log(f"✅ Created complete campaign: {campaign_file}")
-        return config, campaign_file
+        self._campaign_cache = (config, campaign_file)
+        return self._campaign_cache
     
     def create_enhanced_contacts(self):
         """Create enhanced test contacts with all required fields"""
+        if self._contacts_cache is not None:
+            return self._contacts_cache
+        
         contacts = [
             {
                 "name": "Alice Johnson",
@@ -155,29 +227,30 @@ This email was sent to {{email}}. If you no longer wish to receive these emails,
         
         # Save as JSON for flexible processing
         contacts_json = 'contacts/github_test_contacts.json'
-        with open(contacts_json, 'w') as f:
-            json.dump(contacts, f, indent=2)
+        Path(contacts_json).write_bytes(_dumps(contacts))
         
         # Also save as CSV for compatibility
         contacts_csv = 'contacts/github_test_contacts.csv'
-        with open(contacts_csv, 'w') as f:
-            f.write("name,email,company,industry\n")
-            for contact in contacts:
-                f.write(f"{contact['name']},{contact['email']},{contact['company']},{contact['industry']}\n")
+        fields = ['name', 'email', 'company', 'industry']
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator='\n')
+        writer.writerow(fields)
+        writer.writerows([contact[field] for field in fields] for contact in contacts)
+        Path(contacts_csv).write_text(buf.getvalue())
         
         self.log(f"✅ Created enhanced contacts: {len(contacts)} contacts")
+        self._contacts_cache = contacts
         return contacts
     
     def validate_campaign_content(self, campaign_config):
         """Validate that campaign has proper content"""
-        required_fields = ['name', 'template_content']
-        
-        for field in required_fields:
+        for field in REQUIRED_CAMPAIGN_FIELDS:
             if field not in campaign_config:
                 self.log(f"❌ Missing required field: {field}")
                 return False
             
-            if not campaign_config[field] or str(campaign_config[field]).strip() == "":
+            value = campaign_config[field]
+            if not value or (isinstance(value, str) and not value.strip()):
                 self.log(f"❌ Empty required field: {field}")
                 return False
         
@@ -187,7 +260,7 @@ This email was sent to {{email}}. If you no longer wish to receive these emails,
             self.log("❌ Template content missing Subject line")
             return False
             
-        if '{{name}}' not in content and '{{email}}' not in content:
+        if not PERSONALIZATION_RE.search(content):
             self.log("❌ Template content missing personalization fields")
             return False
         
@@ -228,6 +301,7 @@ This email was sent to {{email}}. If you no longer wish to receive these emails,
             
         except Exception as e:
             self.log(f"❌ Original system error: {str(e)}")
+            import traceback
             self.log(f"Error traceback: {traceback.format_exc()}")
             return False
     
@@ -242,14 +316,22 @@ This email was sent to {{email}}. If you no longer wish to receive these emails,
             
             # Extract subject and body from template
             template_content = campaign_config['template_content']
-            lines = template_content.split('\n')
-            subject_line = lines[0].replace('Subject:', '').strip()
-            body_content = '\n'.join(lines[2:])  # Skip subject and empty line
+            # Only the first two newlines matter: subject, blank line, body
+            first, _, rest = template_content.partition('\n')
+            body_content = rest.partition('\n')[2]
+            subject_line = first.removeprefix('Subject:').strip()
+            
+            # Tokenize once; kept on the instance so other paths can reuse them
+            self.subject_segments = tokenize_template(subject_line)
+            self.body_segments = tokenize_template(body_content)
             
             self.log(f"Campaign: {campaign_config['name']}")
             self.log(f"Template Subject: {subject_line}")
             self.log(f"Recipients: {len(contacts)}")
             
+            # One timestamp for the whole simulated batch
+            batch_ts = datetime.now().isoformat()
+            
             # Simulate sending with personalization
             results = {
                 "campaign_name": campaign_config['name'],
@@ -258,43 +340,43 @@ This email was sent to {{email}}. If you no longer wish to receive these emails,
                 "sent": 0,
                 "failed": 0,
                 "mode": "direct_simulation",
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": batch_ts,
                 "recipients": []
             }
             
             self.log("\n--- Email Simulation Results ---")
             
+            log = self.log
+            append_recipient = results["recipients"].append
+            subject_segments, body_segments = self.subject_segments, self.body_segments
+            total = len(contacts)
+            failed = 0
             for i, contact in enumerate(contacts, 1):
                 try:
-                    # Personalize subject and content
-                    personalized_subject = subject_line
-                    personalized_body = body_content
-                    
-                    for field, value in contact.items():
-                        placeholder = f"{{{{{field}}}}}"
-                        personalized_subject = personalized_subject.replace(placeholder, str(value))
-                        personalized_body = personalized_body.replace(placeholder, str(value))
+                    # Personalize subject and content from the pre-tokenized templates
+                    personalized_subject = render_segments(subject_segments, contact)
+                    personalized_body = render_segments(body_segments, contact)
                     
                     # Log simulation
-                    self.log(f"[SIMULATED] {i:2d}/{len(contacts)} - {contact['email']}")
-                    self.log(f"            Subject: {personalized_subject}")
-                    self.log(f"            Preview: {personalized_body[:60]}...")
+                    log(f"[SIMULATED] {i:2d}/{total} - {contact['email']}")
+                    log(f"            Subject: {personalized_subject}")
+                    log(f"            Preview: {personalized_body[:60]}...")
                     
-                    results["recipients"].append({
+                    append_recipient({
                         "email": contact['email'],
                         "name": contact['name'],
                         "company": contact['company'],
                         "industry": contact['industry'],
                         "status": "simulated_success",
                         "personalized_subject": personalized_subject,
-                        "timestamp": datetime.now().isoformat()
+                        "timestamp": batch_ts
                     })
                     
-                    results["sent"] += 1
-                    
                 except Exception as contact_error:
-                    self.log(f"❌ Error processing {contact.get('email', 'unknown')}: {contact_error}")
-                    results["failed"] += 1
+                    log(f"❌ Error processing {contact.get('email', 'unknown')}: {contact_error}")
+                    failed += 1
+            results["sent"] = len(results["recipients"])
+            results["failed"] = failed
             
             # Calculate success rate
             success_rate = (results["sent"] / results["total_recipients"]) * 100 if results["total_recipients"] > 0 else 0
@@ -302,8 +384,7 @@ This email was sent to {{email}}. If you no longer wish to receive these emails,
             
             # Save detailed results
             results_file = f"tracking/direct_simulation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            with open(results_file, 'w') as f:
-                json.dump(results, f, indent=2)
+            Path(results_file).write_bytes(_dumps(results))
             
             self.log(f"\n✅ Direct simulation completed:")
             self.log(f"   - Total: {results['total_recipients']}")
@@ -316,6 +397,7 @@ This email was sent to {{email}}. If you no longer wish to receive these emails,
             
         except Exception as e:
             self.log(f"❌ Direct simulation error: {str(e)}")
+            import traceback
             self.log(f"Error traceback: {traceback.format_exc()}")
             return False
     
@@ -328,27 +410,32 @@ This email was sent to {{email}}. If you no longer wish to receive these emails,
         success = False
         method_used = "none"
         
-        # Try approach 1: Original campaign system
-        if not success:
-            self.log("\n--- Attempt 1: Original Campaign System ---")
-            success = self.run_campaign_with_original_system()
-            if success:
-                method_used = "original_system"
-        
-        # Try approach 2: Direct email simulation
-        if not success:
-            self.log("\n--- Attempt 2: Direct Email Simulation ---")
-            success = self.run_direct_email_simulation()
-            if success:
-                method_used = "direct_simulation"
-        
-        # Generate final report
-        self.generate_execution_report(success, method_used)
+        try:
+            # Try approach 1: Original campaign system
+            if not success:
+                self.log("\n--- Attempt 1: Original Campaign System ---")
+                success = self.run_campaign_with_original_system()
+                if success:
+                    method_used = "original_system"
+                self.flush_logs()
+            
+            # Try approach 2: Direct email simulation
+            if not success:
+                self.log("\n--- Attempt 2: Direct Email Simulation ---")
+                success = self.run_direct_email_simulation()
+                if success:
+                    method_used = "direct_simulation"
+            
+            # Generate final report
+            self.generate_execution_report(success, method_used)
+        finally:
+            self.flush_logs()
         
         return success
     
     def generate_execution_report(self, success, method_used):
         """Generate comprehensive execution report"""
+        now = datetime.now()
         # Count created files
         created_files = []
         file_stats = {}
@@ -356,50 +443,47 @@ This email was sent to {{email}}. If you no longer wish to receive these emails,
         for directory in ['tracking', 'logs', 'contacts', 'scheduled-campaigns', 'templates', 'campaign-templates']:
             if os.path.exists(directory):
                 dir_files = []
-                for file in os.listdir(directory):
-                    file_path = f"{directory}/{file}"
-                    dir_files.append(file_path)
-                    
-                    # Get file stats
-                    try:
-                        stat = os.stat(file_path)
-                        file_stats[file_path] = {
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        dir_files.append(entry.path)
+                        
+                        # Get file stats
+                        try:
+                            stat = entry.stat()
+                        except OSError:  # e.g. a dangling symlink
+                            continue
+                        file_stats[entry.path] = {
                             "size": stat.st_size,
                             "created": datetime.fromtimestamp(stat.st_ctime).isoformat()
                         }
-                    except:
-                        pass
                 
                 created_files.extend(dir_files)
                 if dir_files:
                     self.log(f"📁 {directory}/: {len(dir_files)} files")
         
         report = {
-            "execution_id": f"github_actions_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-            "timestamp": datetime.now().isoformat(),
+            "execution_id": f"github_actions_{now.strftime('%Y%m%d_%H%M%S')}",
+            "timestamp": now.isoformat(),
             "success": success,
             "method_used": method_used,
             "environment": "GitHub Actions",
             "mode": "dry_run" if self.dry_run else "live",
             "files_created": created_files,
             "file_stats": file_stats,
-            "execution_log": self.execution_log[-20:],  # Last 20 log entries
+            "execution_log": list(self.execution_log),  # Last REPORT_LOG_ENTRIES entries
             "summary": {
                 "total_files": len(created_files),
                 "directories_used": len([d for d in ['tracking', 'logs', 'contacts', 'scheduled-campaigns'] if os.path.exists(d)]),
-                "execution_time": datetime.now().isoformat()
+                "execution_time": now.isoformat()
             }
         }
         
         # Save comprehensive report
         report_file = 'logs/enhanced_github_report.json'
-        with open(report_file, 'w') as f:
-            json.dump(report, f, indent=2)
+        Path(report_file).write_bytes(_dumps(report))
         
-        # Also save execution log
+        # The execution log itself is streamed by log()
         log_file = 'logs/execution.log'
-        with open(log_file, 'w') as f:
-            f.write('\n'.join(self.execution_log))
         
         self.log(f"\n📊 Execution Report Generated:")
         self.log(f"   - Success: {success}")
@@ -424,6 +508,7 @@ def main():
             
     except Exception as e:
         print(f"\n💥 Fatal error in GitHub Actions adapter: {e}")
+        import traceback
         traceback.print_exc()
         sys.exit(1)
 
@@ -1,16 +1,23 @@
-from github import Github
+from functools import lru_cache
 import os
 
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 
+@lru_cache(maxsize=1)
+def _client():
+    # PyGithub is imported on first use; one client is shared so every call
+    # reuses its pooled HTTP session
+    from github import Github
+    return Github(GITHUB_TOKEN, retry=3)
+
+@lru_cache(maxsize=32)
+def _repo(repo_name):
+    return _client().get_repo(repo_name)
+
 def create_issue(repo_name, title, body):
-    g = Github(GITHUB_TOKEN)
-    repo = g.get_repo(repo_name)
-    issue = repo.create_issue(title=title, body=body)
+    issue = _repo(repo_name).create_issue(title=title, body=body)
     return issue.number
 
 def comment_issue(repo_name, issue_number, comment):
-    g = Github(GITHUB_TOKEN)
-    repo = g.get_repo(repo_name)
-    issue = repo.get_issue(number=issue_number)
+    issue = _repo(repo_name).get_issue(number=issue_number)
     issue.create_comment(comment)
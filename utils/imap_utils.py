@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+IMAP helpers shared by reply_handler.py and reply_tracker.py
+
+Both fetch only the header fields and the first few KiB of body text of
+each message, several messages per UID FETCH; these helpers split such a
+response per message and rebuild a parseable message from it.
+"""
+
+import email
+import email.message
+import re
+from email.errors import HeaderParseError
+from email.header import decode_header, make_header
+from typing import Iterator, List, Optional, Tuple
+
+# Each message's response starts with its sequence number
+FETCH_START_RE = re.compile(rb'\d+ \(')
+UID_RE = re.compile(rb'UID (\d+)')
+
+
+def split_fetch(fetched: List) -> Iterator[Tuple[bytes, List]]:
+    """
+    Split a multi-message FETCH response into per-message parts
+
+    Yields:
+        Tuples of (uid, parts) where parts holds one message's items
+    """
+    uid, parts = None, []
+    for item in fetched:
+        descriptor = item[0] if isinstance(item, tuple) else item
+        if not isinstance(descriptor, bytes):
+            continue
+        if FETCH_START_RE.match(descriptor):
+            if uid and any(isinstance(part, tuple) for part in parts):
+                yield uid, parts
+            uid, parts = None, []
+        parts.append(item)
+        match = UID_RE.search(descriptor)
+        if match:
+            uid = match.group(1)
+    if uid and any(isinstance(part, tuple) for part in parts):
+        yield uid, parts
+
+
+def parse_partial(msg_data: List) -> email.message.Message:
+    """Rebuild a message from the header fields and body text of a partial FETCH"""
+    literals = [part for part in msg_data if isinstance(part, tuple)]
+    header = b''.join(part[1] for part in literals if b'HEADER' in part[0])
+    text = b''.join(part[1] for part in literals if b'HEADER' not in part[0])
+    return email.message_from_bytes(header + text)
+
+
+def first_text_part(msg: email.message.Message) -> Optional[email.message.Message]:
+    """
+    Pick the part to read the body from in a single walk of the MIME tree
+
+    The first text/plain part wins, then the first text/html part;
+    attachments are skipped. A single-part message is its own body.
+    """
+    html_part = None
+    for part in msg.walk():
+        if part.get_content_disposition() == 'attachment':
+            continue
+        content_type = part.get_content_type()
+        if content_type == 'text/plain':
+            return part
+        if content_type == 'text/html' and html_part is None:
+            html_part = part
+
+    if html_part is None and not msg.is_multipart():
+        return msg
+    return html_part
+
+
+def decode_part(part: Optional[email.message.Message]) -> str:
+    """Decode a part's payload using its declared charset"""
+    if part is None:
+        return ''
+    payload = part.get_payload(decode=True)
+    if payload is None:
+        return ''
+    charset = part.get_content_charset() or 'utf-8'
+    try:
+        return payload.decode(charset, errors='ignore')
+    except LookupError:
+        # Unknown charset name
+        return payload.decode('utf-8', errors='ignore')
+
+
+def decode_header_value(value: str) -> str:
+    """Decode RFC 2047 encoded-words (=?charset?...?=) in a header value"""
+    value = str(value)
+    if '=?' not in value:
+        return value
+    try:
+        return str(make_header(decode_header(value)))
+    except (HeaderParseError, LookupError, UnicodeError):
+        return value
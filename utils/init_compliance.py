@@ -4,75 +4,101 @@ Quick fix script to initialize missing compliance and tracking files
 Run this before your campaign execution
 """
 
+import os
 import json
 from pathlib import Path
 from datetime import datetime
 
+
+CONTACTS_DIR = Path("contacts")
+TRACKING_DIR = Path("tracking")
+SUPPRESSION_LIST = CONTACTS_DIR / "suppression_list.json"
+SUPPRESSION_LOG = CONTACTS_DIR / "suppression_log.jsonl"
+REPLY_LOG = CONTACTS_DIR / "reply_log.jsonl"
+RATE_LIMITS = TRACKING_DIR / "rate_limits.json"
+UNSUBSCRIBED = TRACKING_DIR / "unsubscribed.json"
+
+
+def _ensure_dir(path):
+    """Create path if missing; returns True only when it was created"""
+    if path.is_dir():
+        return False
+    path.mkdir(parents=True, exist_ok=True)
+    return True
+
+
+def _create_file(path, content=b''):
+    """Atomically create path with content; returns False if it already exists"""
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, 'wb') as f:
+        f.write(content)
+    return True
+
 def initialize_compliance_files():
     """Create all required compliance and tracking files"""
     
     print("🔧 Initializing compliance and tracking files...")
     
-    # 1. Create contacts directory
-    contacts_dir = Path("contacts")
-    contacts_dir.mkdir(exist_ok=True)
-    print(f"✅ Created {contacts_dir}")
-    
-    # 2. Create suppression list
-    suppression_file = contacts_dir / "suppression_list.json"
-    if not suppression_file.exists():
-        suppression_data = {
-            "suppressed_emails": [],
-            "last_updated": datetime.now().isoformat(),
-            "count": 0,
-            "version": "1.0"
-        }
-        with open(suppression_file, 'w') as f:
-            json.dump(suppression_data, f, indent=2)
-        print(f"✅ Created {suppression_file}")
-    else:
-        print(f"ℹ️  {suppression_file} already exists")
-    
-    # 3. Create suppression log
-    suppression_log = contacts_dir / "suppression_log.jsonl"
-    if not suppression_log.exists():
-        suppression_log.touch()
-        print(f"✅ Created {suppression_log}")
-    
-    # 4. Create reply log
-    reply_log = contacts_dir / "reply_log.jsonl"
-    if not reply_log.exists():
-        reply_log.touch()
-        print(f"✅ Created {reply_log}")
-    
-    # 5. Create tracking directory
-    tracking_dir = Path("tracking")
-    tracking_dir.mkdir(exist_ok=True)
-    print(f"✅ Created {tracking_dir}")
+    # 1. Create contacts and tracking directories
+    for directory in (CONTACTS_DIR, TRACKING_DIR):
+        if _ensure_dir(directory):
+            print(f"✅ Created {directory}")
     
-    # 6. Create rate limits file
-    rate_limits_file = tracking_dir / "rate_limits.json"
-    today = datetime.now().date().isoformat()
-    
-    rate_data = {
-        "daily_sent": 0,
-        "last_reset": today,
-        "domain_counts": {},
+    # 2. Create suppression list, suppression/reply logs and unsubscribed list
+    suppression_data = {
+        "suppressed_emails": [],
         "last_updated": datetime.now().isoformat(),
+        "count": 0,
         "version": "1.0"
     }
+    defaults = [
+        (SUPPRESSION_LIST, json.dumps(suppression_data, indent=2).encode()),
+        (SUPPRESSION_LOG, b''),
+        (REPLY_LOG, b''),
+        (UNSUBSCRIBED, b'{}'),
+    ]
+    for path, content in defaults:
+        if _create_file(path, content):
+            print(f"✅ Created {path}")
+        else:
+            print(f"ℹ️  {path} already exists")
     
-    with open(rate_limits_file, 'w') as f:
-        json.dump(rate_data, f, indent=2)
-    print(f"✅ Created {rate_limits_file}")
+    # 3. Create or roll over rate limits file
+    today = datetime.now().date().isoformat()
     
-    # 7. Create unsubscribed list
-    unsubscribed_file = tracking_dir / "unsubscribed.json"
-    if not unsubscribed_file.exists():
-        unsubscribed_data = {}
-        with open(unsubscribed_file, 'w') as f:
-            json.dump(unsubscribed_data, f, indent=2)
-        print(f"✅ Created {unsubscribed_file}")
+    try:
+        rate_data = json.loads(RATE_LIMITS.read_bytes())
+    except FileNotFoundError:
+        rate_data = None
+    except ValueError:
+        print(f"⚠️  {RATE_LIMITS} is unreadable, recreating it")
+        rate_data = None
+    
+    if rate_data is None:
+        rate_data = {
+            "daily_sent": 0,
+            "last_reset": today,
+            "domain_counts": {},
+            "last_updated": datetime.now().isoformat(),
+            "version": "1.0"
+        }
+        with open(RATE_LIMITS, 'w') as f:
+            json.dump(rate_data, f, indent=2)
+        print(f"✅ Created {RATE_LIMITS}")
+    elif rate_data.get("last_reset") != today:
+        # Keep accumulated state; only the daily counters roll over
+        rate_data["daily_sent"] = 0
+        rate_data["domain_counts"] = {}
+        rate_data["last_reset"] = today
+        rate_data["last_updated"] = datetime.now().isoformat()
+        with open(RATE_LIMITS, 'w') as f:
+            json.dump(rate_data, f, indent=2)
+        print(f"✅ Reset daily counters in {RATE_LIMITS}")
+    else:
+        print(f"ℹ️  {RATE_LIMITS} already exists")
     
     print("\n✅ All compliance files initialized successfully!")
     return True
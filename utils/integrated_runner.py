@@ -7,133 +7,319 @@ This script coordinates data_loader.py, docx_parser.py, and generate_summary.py
 import os
 import sys
 import json
+import runpy
+import pickle
+import signal
+import stat
+import asyncio
 import argparse
-import subprocess
+import contextlib
+import functools
+import importlib.util
+from importlib.util import find_spec
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
-def run_command(cmd, description="", timeout=300):
-    """Run a command and capture output with proper error handling"""
-    print(f"\n{'='*60}")
-    print(f"STEP: {description}")
-    print(f"{'='*60}")
-    print(f"Command: {' '.join(cmd) if isinstance(cmd, list) else cmd}")
-    
+
+_UTILS_DIR = Path(__file__).resolve().parent
+_SUPPORTED_EXT = frozenset({'.csv', '.xlsx', '.url', '.json', '.docx', '.txt'})
+_CAMPAIGN_EXT = frozenset({'.txt', '.html', '.md', '.json', '.docx'})
+
+
+def _dumps(obj):
+    """Serialize obj as indented JSON bytes, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=str,
+                            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, indent=2, default=str).encode()
+
+
+def _write_file(path, data):
+    """Write a bytes payload straight to path with os.write, no userspace buffer"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
     try:
-        if isinstance(cmd, str):
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=timeout)
-        else:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
-        
-        print(f"Exit code: {result.returncode}")
-        
-        # Always show stdout if there is any
-        if result.stdout:
-            print(f"\nSTDOUT:")
-            print(result.stdout)
-        
-        # Show stderr if there is any
-        if result.stderr:
-            print(f"\nSTDERR:")
-            print(result.stderr)
-        
-        success = result.returncode == 0
-        if success:
-            print(f"✅ {description} completed successfully")
-        else:
-            print(f"❌ {description} failed with exit code {result.returncode}")
-        
-        return success, result.stdout, result.stderr
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_load_contacts():
+    """Import utils/data_loader.py once, without touching sys.path"""
+    data_loader_path = _UTILS_DIR / 'data_loader.py'
+    spec = importlib.util.spec_from_file_location("data_loader", data_loader_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    try:
+        return module.load_contacts
+    except AttributeError:
+        raise ImportError(f"cannot import name 'load_contacts' from 'data_loader' ({data_loader_path})")
+
+
+async def _drain_stream(stream, sink, tail):
+    """Echo a subprocess stream line by line to sink, keeping a bounded tail"""
+    async for raw_line in stream:
+        line = raw_line.decode(errors='replace')
+        sink.write(line)
+        tail.append(line)
+
+
+async def _feed_stdin(stdin, data):
+    """Write data to a subprocess's stdin and close it"""
+    try:
+        stdin.write(data)
+        await stdin.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        pass  # the child exited without reading all of it
+    finally:
+        stdin.close()
+
+
+async def _run_async(cmd, timeout, tail_lines, input_data=None):
+    """Run cmd, draining stdout and stderr concurrently; returns (returncode, stdout, stderr)"""
+    pipes = dict(stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, limit=1 << 20)
+    if input_data is not None:
+        pipes['stdin'] = asyncio.subprocess.PIPE
+    if isinstance(cmd, str):
+        process = await asyncio.create_subprocess_shell(cmd, **pipes)
+    else:
+        process = await asyncio.create_subprocess_exec(*cmd, **pipes)
+    
+    stdout_tail = deque(maxlen=tail_lines)
+    stderr_tail = deque(maxlen=tail_lines)
+    steps = [
+        _drain_stream(process.stdout, sys.stdout, stdout_tail),
+        _drain_stream(process.stderr, sys.stderr, stderr_tail),
+        process.wait()
+    ]
+    if input_data is not None:
+        steps.append(_feed_stdin(process.stdin, input_data))
+    try:
+        await asyncio.wait_for(asyncio.gather(*steps), timeout)
+    except BaseException:
+        # Timed out or failed mid-stream: never leave the child running
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+    return process.returncode, ''.join(stdout_tail), ''.join(stderr_tail)
+
+
+def run_command(cmd, description="", timeout=300, tail_lines=10000, input_data=None):
+    """Run a command, streaming its output live, with proper error handling
     
-    except subprocess.TimeoutExpired:
+    stdout and stderr are drained concurrently so neither pipe can fill up
+    and stall the child; only the last tail_lines lines of each are kept.
+    input_data (bytes), if given, is written to the child's stdin.
+    """
+    print(f"\n{'='*60}\nSTEP: {description}\n{'='*60}\n"
+          f"Command: {' '.join(cmd) if isinstance(cmd, list) else cmd}\n\nOUTPUT:")
+    
+    try:
+        returncode, stdout, stderr = asyncio.run(_run_async(cmd, timeout, tail_lines, input_data))
+    except asyncio.TimeoutError:
         print(f"⏰ ERROR: {description} timed out after {timeout} seconds")
         return False, "", f"Command timed out after {timeout} seconds"
     except Exception as e:
         print(f"💥 ERROR: {description} failed with exception: {str(e)}")
         return False, "", str(e)
+    
+    print(f"Exit code: {returncode}")
+    
+    success = returncode == 0
+    if success:
+        print(f"✅ {description} completed successfully")
+    else:
+        print(f"❌ {description} failed with exit code {returncode}")
+    
+    return success, stdout, stderr
+
+
+class _StepTimeout(BaseException):
+    """Raised inside an in-process step that ran past its timeout
+    
+    A BaseException, so the script's own `except Exception` handlers
+    cannot swallow it.
+    """
+
+
+class _TeeStdout:
+    """Echo writes to the real stdout while keeping a bounded tail of them"""
+    
+    def __init__(self, stream, tail_lines):
+        self._stream = stream
+        self.tail = deque(maxlen=tail_lines)
+    
+    def write(self, text):
+        self.tail.append(text)
+        return self._stream.write(text)
+    
+    def flush(self):
+        self._stream.flush()
+    
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def run_script(script, argv, description="", timeout=None, tail_lines=10000):
+    """Run a utils script's __main__ block in this interpreter
+    
+    Avoids starting a fresh python process (and re-importing its heavy
+    dependencies) for each step. Returns (success, stdout, stderr) like
+    run_command; stderr is left on the console.
+    
+    timeout is enforced with SIGALRM, so only on platforms that have it and
+    when called from the main thread; elsewhere the step runs unbounded.
+    """
+    print(f"\n{'='*60}\nSTEP: {description}\n{'='*60}\n"
+          f"Running in-process: {script} {' '.join(argv)}")
+    
+    saved_argv = sys.argv
+    sys.argv = [str(script)] + list(argv)
+    tee = _TeeStdout(sys.stdout, tail_lines)
+    returncode = 0
+    
+    alarm = (timeout is not None and hasattr(signal, 'SIGALRM')
+             and threading.current_thread() is threading.main_thread())
+    if alarm:
+        def expire(signum, frame):
+            raise _StepTimeout()
+        previous_handler = signal.signal(signal.SIGALRM, expire)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        with contextlib.redirect_stdout(tee):
+            runpy.run_path(str(script), run_name="__main__")
+    except SystemExit as e:
+        if isinstance(e.code, int):
+            returncode = e.code
+        elif e.code is not None:
+            print(e.code, file=sys.stderr)
+            returncode = 1
+    except _StepTimeout:
+        print(f"⏰ ERROR: {description} timed out after {timeout} seconds")
+        return False, ''.join(tee.tail), f"Script timed out after {timeout} seconds"
+    except Exception as e:
+        print(f"💥 ERROR: {description} failed with exception: {str(e)}")
+        return False, ''.join(tee.tail), str(e)
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+        sys.argv = saved_argv
+    
+    print(f"Exit code: {returncode}")
+    
+    success = returncode == 0
+    if success:
+        print(f"✅ {description} completed successfully")
+    else:
+        print(f"❌ {description} failed with exit code {returncode}")
+    
+    return success, ''.join(tee.tail), ""
 
 
 def load_contacts_unified(contacts_dir):
     """Load contacts using data_loader.py with comprehensive error handling"""
-    contacts = []
-    
     if not os.path.exists(contacts_dir):
         print(f"❌ Contacts directory not found: {contacts_dir}")
-        return contacts
+        return []
     
     # FIXED: Check for data_loader.py in utils/ directory
-    utils_dir = Path(__file__).parent
+    utils_dir = _UTILS_DIR
     data_loader_path = utils_dir / 'data_loader.py'
     
     if not data_loader_path.exists():
         print(f"❌ data_loader.py not found at: {data_loader_path}")
         print(f"   Looking in: {utils_dir}")
-        return contacts
+        return []
     
     print(f"📁 Loading contacts from directory: {contacts_dir}")
     
     # Import data_loader dynamically to handle import errors
-    sys.path.insert(0, str(utils_dir))
     try:
-        from data_loader import load_contacts
+        load_contacts = _get_load_contacts()
         print("✅ Successfully imported data_loader")
     except ImportError as e:
         print(f"❌ Failed to import data_loader: {e}")
-        return contacts
+        return []
     except Exception as e:
         print(f"❌ Unexpected error importing data_loader: {e}")
-        return contacts
+        return []
     
     # Process each file in contacts directory
-    supported_extensions = ['.csv', '.xlsx', '.url', '.json', '.docx', '.txt']
     processed_files = 0
+    raw_count = 0
+    unique_contacts = {}
     
-    for filename in sorted(os.listdir(contacts_dir)):
-        if filename.startswith('.'):
+    # DirEntry caches the file type from the directory read itself
+    with os.scandir(contacts_dir) as it:
+        entries = sorted((entry for entry in it
+                          if not entry.name.startswith('.') and entry.is_file()),
+                         key=lambda entry: entry.name)
+    
+    files = []
+    for entry in entries:
+        file_ext = os.path.splitext(entry.name)[1].lower()
+        if file_ext not in _SUPPORTED_EXT:
+            print(f"⏭️ Skipping unsupported file: {entry.name}")
             continue
+        files.append((entry.name, entry.path))
+    
+    # Loaders are I/O bound (Google Sheets URLs especially), so files are
+    # fetched concurrently; results are merged in filename order so the
+    # first-seen contact for an email stays deterministic
+    lower, strip = str.lower, str.strip  # bound once for the dedup loop
+    if files:
+        with ThreadPoolExecutor(max_workers=min(16, len(files))) as executor:
+            futures = [(filename, executor.submit(load_contacts, file_path))
+                       for filename, file_path in files]
             
-        file_path = os.path.join(contacts_dir, filename)
-        if not os.path.isfile(file_path):
-            continue
-        
-        file_ext = os.path.splitext(filename)[1].lower()
-        if file_ext not in supported_extensions:
-            print(f"⏭️ Skipping unsupported file: {filename}")
-            continue
-        
-        try:
-            print(f"📄 Processing: {filename}")
-            file_contacts = load_contacts(file_path)
-            
-            if file_contacts:
-                print(f"✅ Loaded {len(file_contacts)} contacts from {filename}")
-                contacts.extend(file_contacts)
-                processed_files += 1
-            else:
-                print(f"⚠️ No contacts found in {filename}")
-                
-        except Exception as e:
-            print(f"❌ Error loading {filename}: {e}")
-            continue
+            for filename, future in futures:
+                try:
+                    print(f"📄 Processing: {filename}")
+                    file_contacts = future.result()
+                    
+                    if file_contacts:
+                        print(f"✅ Loaded {len(file_contacts)} contacts from {filename}")
+                        raw_count += len(file_contacts)
+                        processed_files += 1
+                        
+                        # Deduplicate by email as we go, merging extra info from duplicates
+                        for contact in file_contacts:
+                            raw_email = contact.get('email')
+                            # Blank or non-text (e.g. NaN from a spreadsheet) emails are skipped
+                            if not raw_email or not isinstance(raw_email, str):
+                                continue
+                            email = strip(lower(raw_email))
+                            if not email:
+                                continue
+                            existing = unique_contacts.get(email)
+                            if existing is None:
+                                unique_contacts[email] = contact
+                            else:
+                                existing |= {key: value for key, value in contact.items()
+                                             if value and key not in existing}
+                    else:
+                        print(f"⚠️ No contacts found in {filename}")
+                        
+                except Exception as e:
+                    print(f"❌ Error loading {filename}: {e}")
+                    continue
     
-    # Remove duplicates by email
     print(f"\n📊 Processing results:")
     print(f"   Files processed: {processed_files}")
-    print(f"   Raw contacts loaded: {len(contacts)}")
-    
-    unique_contacts = {}
-    for contact in contacts:
-        email = contact.get('email', '').lower().strip()
-    
-        if email and email not in unique_contacts:
-            unique_contacts[email] = contact
-        elif email:
-            # Merge additional info from duplicate
-            existing = unique_contacts[email]
-            for key, value in contact.items():
-                if key not in existing and value:
-                    existing[key] = value
+    print(f"   Raw contacts loaded: {raw_count}")
     
     final_contacts = list(unique_contacts.values())
     print(f"   Unique contacts: {len(final_contacts)}")
@@ -159,7 +345,10 @@ def validate_setup(args):
     issues = []
     warnings = []
     
-    print(f"\n🔍 Validating system setup...")
+    # Report lines are collected and written in one go
+    lines = []
+    emit = lines.append
+    emit(f"\n🔍 Validating system setup...")
     
     # Check directories
     for dir_name, dir_path in [
@@ -170,79 +359,86 @@ def validate_setup(args):
         if not os.path.exists(dir_path):
             issues.append(f"Missing {dir_name} directory: {dir_path}")
         else:
-            print(f"✅ Found {dir_name} directory: {dir_path}")
+            emit(f"✅ Found {dir_name} directory: {dir_path}")
     
     # Check templates directory (optional)
     if args.templates and not os.path.exists(args.templates):
         warnings.append(f"Templates directory not found: {args.templates}")
     elif args.templates:
-        print(f"✅ Found templates directory: {args.templates}")
+        emit(f"✅ Found templates directory: {args.templates}")
     
     # FIXED: Check required Python files in utils/ directory
-    utils_dir = Path(__file__).parent
+    utils_dir = _UTILS_DIR
     required_files = {
         'data_loader.py': utils_dir / 'data_loader.py',
         'docx_parser.py': utils_dir / 'docx_parser.py',
         'generate_summary.py': utils_dir / 'generate_summary.py'
     }
     
-    print(f"\n📂 Checking utils directory: {utils_dir}")
+    emit(f"\n📂 Checking utils directory: {utils_dir}")
     
     for name, path in required_files.items():
         if path.exists():
-            print(f"✅ Found {name}")
+            emit(f"✅ Found {name}")
         else:
             # Also check current directory as fallback
             alt_path = Path(name)
             if alt_path.exists():
-                print(f"✅ Found {name} (in current directory)")
+                emit(f"✅ Found {name} (in current directory)")
             else:
                 warnings.append(f"Optional file not found: {name}")
-                print(f"⚠️ {name} not found (some features may be limited)")
+                emit(f"⚠️ {name} not found (some features may be limited)")
     
     # Check contacts directory has files
     if os.path.exists(args.contacts):
-        contact_files = [f for f in os.listdir(args.contacts) 
-                        if f.endswith(('.csv', '.xlsx', '.url', '.docx', '.txt', '.json'))]
+        with os.scandir(args.contacts) as it:
+            contact_files = [entry.name for entry in it
+                             if os.path.splitext(entry.name)[1].lower() in _SUPPORTED_EXT
+                             and entry.is_file()]
         if not contact_files:
             warnings.append(f"No contact files found in {args.contacts}")
         else:
-            print(f"✅ Found {len(contact_files)} contact files in {args.contacts}")
+            emit(f"✅ Found {len(contact_files)} contact files in {args.contacts}")
     
     # Check scheduled campaigns
     if os.path.exists(args.scheduled):
-        campaign_files = [f for f in os.listdir(args.scheduled)
-                         if f.endswith(('.txt', '.html', '.md', '.json', '.docx'))]
+        with os.scandir(args.scheduled) as it:
+            campaign_files = [entry.name for entry in it
+                              if os.path.splitext(entry.name)[1].lower() in _CAMPAIGN_EXT
+                              and entry.is_file()]
         if not campaign_files:
             warnings.append(f"No campaign files found in {args.scheduled}")
         else:
-            print(f"✅ Found {len(campaign_files)} campaign files in {args.scheduled}")
+            emit(f"✅ Found {len(campaign_files)} campaign files in {args.scheduled}")
     
-    # Check Python dependencies
-    try:
-        import requests
-        print("✅ requests library available")
-    except ImportError:
+    # Check Python dependencies (find_spec locates a module without importing it)
+    if find_spec('requests') is not None:
+        emit("✅ requests library available")
+    else:
         warnings.append("requests library not available - Google Sheets URLs may not work")
     
-    try:
-        import pandas
-        print("✅ pandas library available")
-    except ImportError:
+    if find_spec('pandas') is not None:
+        emit("✅ pandas library available")
+    else:
         warnings.append("pandas library not available - Excel files may not work optimally")
     
     if warnings:
-        print(f"\n⚠️ Warnings:")
+        emit(f"\n⚠️ Warnings:")
         for warning in warnings:
-            print(f"   - {warning}")
+            emit(f"   - {warning}")
     
+    sys.stdout.write('\n'.join(lines) + '\n')
+    sys.stdout.flush()
     return issues, warnings
 
 
 def save_execution_metadata(args, contacts_count, tracking_dir):
     """Save execution metadata for debugging and reporting"""
-    metadata = {
-        'execution_time': datetime.now().isoformat(),
+    metadata_file = os.path.join(tracking_dir, 'execution_metadata.json')
+    
+    # Built inline and serialized straight away; second precision is plenty here
+    _write_file(metadata_file, _dumps({
+        'execution_time': datetime.now().isoformat(timespec='seconds'),
         'mode': 'dry-run' if args.dry_run else 'live',
         'contacts_loaded': contacts_count,
         'directories': {
@@ -263,11 +459,7 @@ def save_execution_metadata(args, contacts_count, tracking_dir):
             'working_directory': os.getcwd(),
             'environment': 'github-actions' if os.getenv('GITHUB_ACTIONS') else 'local'
         }
-    }
-    
-    metadata_file = os.path.join(tracking_dir, 'execution_metadata.json')
-    with open(metadata_file, 'w') as f:
-        json.dump(metadata, f, indent=2)
+    }))
     
     print(f"📝 Execution metadata saved to: {metadata_file}")
 
@@ -293,22 +485,27 @@ def main():
     
     args = parser.parse_args()
     
-    print("="*80)
-    print("INTEGRATED EMAIL CAMPAIGN SYSTEM")
-    print("="*80)
-    print(f"Start time: {datetime.now()}")
-    print(f"Mode: {'DRY-RUN' if args.dry_run else 'LIVE'}")
-    print(f"Contacts dir: {args.contacts}")
-    print(f"Scheduled dir: {args.scheduled}")
-    print(f"Tracking dir: {args.tracking}")
-    print(f"Templates dir: {args.templates}")
-    print(f"Alerts email: {args.alerts}")
+    banner = [
+        "="*80,
+        "INTEGRATED EMAIL CAMPAIGN SYSTEM",
+        "="*80,
+        f"Start time: {datetime.now()}",
+        f"Mode: {'DRY-RUN' if args.dry_run else 'LIVE'}",
+        f"Contacts dir: {args.contacts}",
+        f"Scheduled dir: {args.scheduled}",
+        f"Tracking dir: {args.tracking}",
+        f"Templates dir: {args.templates}",
+        f"Alerts email: {args.alerts}",
+    ]
     
     if args.compliance:
-        print(f"\n🔒 COMPLIANCE MODE ENABLED")
-        print(f"   Daily limit: {args.daily_limit}")
-        print(f"   Per-domain limit: {args.per_domain_limit}")
-        print(f"   Suppression file: {args.suppression_file}")
+        banner += [
+            f"\n🔒 COMPLIANCE MODE ENABLED",
+            f"   Daily limit: {args.daily_limit}",
+            f"   Per-domain limit: {args.per_domain_limit}",
+            f"   Suppression file: {args.suppression_file}",
+        ]
+    print('\n'.join(banner))
     
     # Create required directories
     os.makedirs(args.tracking, exist_ok=True)
@@ -331,9 +528,7 @@ def main():
                 print(f"\nForcing continuation despite validation issues...")
     
     # Step 2: Contact Loading
-    print(f"\n" + "="*80)
-    print("STEP 1: CONTACT LOADING")
-    print("="*80)
+    print(f"\n{'='*80}\nSTEP 1: CONTACT LOADING\n{'='*80}")
     
     contacts = load_contacts_unified(args.contacts)
     
@@ -342,8 +537,7 @@ def main():
         
         # Save contacts for campaign processor
         contacts_file = os.path.join(args.tracking, 'loaded_contacts.json')
-        with open(contacts_file, 'w') as f:
-            json.dump(contacts, f, indent=2, default=str)
+        _write_file(contacts_file, _dumps(contacts))
         print(f"Contacts saved to: {contacts_file}")
         
         # Save execution metadata
@@ -363,17 +557,14 @@ def main():
     
     # Step 3: Campaign Processing
     if not args.summary_only:
-        print(f"\n" + "="*80)
-        print("STEP 2: CAMPAIGN PROCESSING")
-        print("="*80)
+        print(f"\n{'='*80}\nSTEP 2: CAMPAIGN PROCESSING\n{'='*80}")
         
         # FIXED: Use utils/docx_parser.py
-        utils_dir = Path(__file__).parent
-        docx_parser = utils_dir / 'docx_parser.py'
+        docx_parser = _UTILS_DIR / 'docx_parser.py'
         
         # Build docx_parser command
         cmd = [
-            'python', str(docx_parser),
+            sys.executable, str(docx_parser),
             '--contacts', args.contacts,
             '--scheduled', args.scheduled, 
             '--tracking', args.tracking,
@@ -395,15 +586,22 @@ def main():
             print(f"   Per-Domain Limit: {args.per_domain_limit}")
             print(f"   Suppression File: {args.suppression_file}")
         
-        success, stdout, stderr = run_command(cmd, "Campaign Processing", timeout=600)
+        # Hand the already-parsed contacts over stdin instead of having the
+        # campaign step re-read the directory
+        contacts_input = None
+        if contacts:
+            cmd.append('--contacts-stdin')
+            contacts_input = pickle.dumps(contacts, protocol=pickle.HIGHEST_PROTOCOL)
+        
+        # A subprocess, so a hung SMTP session can be killed at the timeout
+        success, stdout, stderr = run_command(cmd, "Campaign Processing", timeout=600,
+                                              input_data=contacts_input)
         
         if not success:
             print("Campaign processing encountered issues, but continuing to summary generation")
     
     # Step 4: Summary Generation
-    print(f"\n" + "="*80)
-    print("STEP 3: SUMMARY GENERATION")
-    print("="*80)
+    print(f"\n{'='*80}\nSTEP 3: SUMMARY GENERATION\n{'='*80}")
     
     # Determine log file
     log_files = []
@@ -412,21 +610,18 @@ def main():
     else:
         log_files = ["campaign_execution.log", "campaign.log", "dryrun.log"]
     
-    log_file = None
-    for lf in log_files:
-        if os.path.exists(lf):
-            log_file = lf
-            break
+    # One directory scan instead of a stat per candidate log file
+    with os.scandir('.') as it:
+        cwd_files = {entry.name: entry for entry in it if entry.is_file()}
+    log_file = next((lf for lf in log_files if lf in cwd_files), None)
     
     if log_file:
         print(f"Using log file: {log_file}")
         
         # FIXED: Use utils/generate_summary.py
-        utils_dir = Path(__file__).parent
-        generate_summary = utils_dir / 'generate_summary.py'
+        generate_summary = _UTILS_DIR / 'generate_summary.py'
         
         summary_cmd = [
-            'python', str(generate_summary),
             '--log-file', log_file,
             '--mode', 'dry-run' if args.dry_run else 'live',
             '--contacts-dir', args.contacts,
@@ -438,7 +633,7 @@ def main():
         summary_output = os.path.join(args.tracking, 'campaign_summary.md')
         summary_cmd.extend(['--output-summary', summary_output])
         
-        success, stdout, stderr = run_command(summary_cmd, "Summary Generation", timeout=300)
+        success, stdout, stderr = run_script(generate_summary, summary_cmd, "Summary Generation", timeout=300)
         
         if success and os.path.exists(summary_output):
             print(f"Summary generated successfully: {summary_output}")
@@ -455,51 +650,57 @@ def main():
         print(f"No log file found for summary generation")
         print(f"Checked for: {', '.join(log_files)}")
     
-    # Step 5: Final Status Report
-    print(f"\n" + "="*80)
-    print("EXECUTION COMPLETE")
-    print("="*80)
+    # Step 5: Final Status Report (written in one go)
+    lines = []
+    emit = lines.append
+    emit(f"\n{'='*80}\nEXECUTION COMPLETE\n{'='*80}")
     
     final_status = "SUCCESS"
     
     # Check results
     if contacts:
-        print(f"Contacts loaded: {len(contacts)}")
+        emit(f"Contacts loaded: {len(contacts)}")
     else:
-        print(f"Contacts loaded: 0 (WARNING)")
+        emit(f"Contacts loaded: 0 (WARNING)")
         final_status = "PARTIAL"
     
-    print(f"Mode: {'DRY-RUN' if args.dry_run else 'LIVE'}")
+    emit(f"Mode: {'DRY-RUN' if args.dry_run else 'LIVE'}")
     if args.compliance:
-        print(f"Compliance: ENABLED")
+        emit(f"Compliance: ENABLED")
     
     # List generated files
     if os.path.exists(args.tracking):
         tracking_files = [f for f in os.listdir(args.tracking) if os.path.isfile(os.path.join(args.tracking, f))]
         if tracking_files:
-            print(f"\nGenerated files in {args.tracking}:")
+            emit(f"\nGenerated files in {args.tracking}:")
             for file in tracking_files:
                 file_path = os.path.join(args.tracking, file)
                 size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
-                print(f"  - {file} ({size:,} bytes)")
+                emit(f"  - {file} ({size:,} bytes)")
         else:
-            print(f"No files generated in {args.tracking}")
+            emit(f"No files generated in {args.tracking}")
             final_status = "ISSUES"
     
-    # Check for log files in current directory
+    # Check for log files in current directory (stat'ed now: steps above may
+    # have created or grown them since the earlier directory scan)
     log_files_found = []
     for lf in ["campaign_execution.log", "dryrun.log", "campaign.log", "error.log"]:
-        if os.path.exists(lf):
-            size = os.path.getsize(lf)
-            log_files_found.append(f"  - {lf} ({size:,} bytes)")
+        try:
+            st = os.stat(lf)
+        except OSError:
+            continue
+        if stat.S_ISREG(st.st_mode):
+            log_files_found.append(f"  - {lf} ({st.st_size:,} bytes)")
     
     if log_files_found:
-        print(f"\nLog files generated:")
+        emit(f"\nLog files generated:")
         for lf in log_files_found:
-            print(lf)
+            emit(lf)
     
-    print(f"\nFinal Status: {final_status}")
-    print(f"Completed: {datetime.now()}")
+    emit(f"\nFinal Status: {final_status}")
+    emit(f"Completed: {datetime.now()}")
+    sys.stdout.write('\n'.join(lines) + '\n')
+    sys.stdout.flush()
     
     return 0 if final_status in ["SUCCESS", "PARTIAL"] else 1
 
@@ -1,3 +1,17 @@
+import bisect
+import math
+
+# Response rates below 0.1 are low and above 0.5 are high; both bounds
+# themselves count as normal, hence the upper threshold just above 0.5
+# with right-side bisection
+_THRESHOLDS = (0.1, math.nextafter(0.5, math.inf))
+_MESSAGES = (
+    "Low response rate, consider improving subject line.",
+    "Response rate normal.",
+    "High engagement! Keep current approach.",
+)
+
+
 def recommend(campaign_data):
     """
     Analyze response rates and provide simple recommendations.
@@ -6,10 +20,17 @@ def recommend(campaign_data):
     replies = campaign_data.get("replies", 0)
     if sent == 0:
         return "No emails sent yet."
-    rate = replies / sent
-    if rate < 0.1:
-        return "Low response rate, consider improving subject line."
-    elif rate > 0.5:
-        return "High engagement! Keep current approach."
-    else:
-        return "Response rate normal."
+    return _MESSAGES[bisect.bisect_right(_THRESHOLDS, replies / sent)]
+
+
+def recommend_batch(rates):
+    """
+    Recommendations for a sequence of response rates (vectorized with numpy when available).
+    """
+    # numpy is imported on first use so importing this module stays cheap
+    try:
+        import numpy as np
+    except ImportError:
+        return [_MESSAGES[bisect.bisect_right(_THRESHOLDS, rate)] for rate in rates]
+    indices = np.searchsorted(_THRESHOLDS, np.asarray(rates, dtype=float), side="right")
+    return [_MESSAGES[i] for i in indices.tolist()]
@@ -1,14 +1,20 @@
 import yaml
 import sys
 
+try:
+    from yaml import CSafeLoader as _Loader, CSafeDumper as _Dumper
+except ImportError:
+    from yaml import SafeLoader as _Loader, SafeDumper as _Dumper
+
 def reformat_yaml(input_file, output_file=None, indent=2):
     try:
         # Read the YAML content
-        with open(input_file, 'r') as f:
-            data = yaml.safe_load(f)
+        # libyaml accepts bytes and decodes UTF-8 itself
+        with open(input_file, 'rb') as f:
+            data = yaml.load(f, Loader=_Loader)
 
         # Write it back with correct indentation
-        formatted_yaml = yaml.dump(data, indent=indent, default_flow_style=False, sort_keys=False)
+        formatted_yaml = yaml.dump(data, Dumper=_Dumper, indent=indent, default_flow_style=False, sort_keys=False)
 
         if output_file:
             with open(output_file, 'w') as f:
@@ -4,15 +4,67 @@ Enhanced Reply Handler - Process unsubscribe requests and replies
 Integrates seamlessly with ComplianceWrapper
 """
 
+import atexit
 import imaplib
-import email
 import json
 import re
+import select
 import time
+from collections import Counter
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Set, Optional, Tuple
 import os
+import sys
+
+# Shared IMAP helpers live next to this script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+from imap_utils import decode_header_value, decode_part, first_text_part, parse_partial, split_fetch
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+ANGLE_RE = re.compile(r'<([^>]+)>')
+EMAIL_RE = re.compile(r'[\w\.-]+@[\w\.-]+\.\w+')
+# Common patterns in bounce messages naming the address that bounced
+BOUNCE_PATTERNS = [
+    re.compile(r'(?:to|for|recipient|address)[\s:]+<?([a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)>?', re.IGNORECASE),
+    re.compile(r'<?([a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)>?.*(?:not found|unknown|rejected)', re.IGNORECASE),
+]
+
+# Directories already created (or found) by this process; handlers
+# created repeatedly skip the mkdir syscalls
+_DIRS_CREATED: Set[Path] = set()
+
+
+def _ensure_dir(path: Path):
+    """mkdir(exist_ok=True) once per process for each directory"""
+    # absolute() only joins the cwd (no stat), so relative paths stay correct
+    path = path.absolute()
+    if path not in _DIRS_CREATED:
+        path.mkdir(exist_ok=True)
+        _DIRS_CREATED.add(path)
+
+
+# Category field of a reply log line, read without parsing the whole entry
+CATEGORY_RE = re.compile(rb'"category"\s*:\s*"([^"]+)"')
+
+# Keywords sit near the top of a reply, so only this much of the body is
+# fetched and scanned; quoted history and encoded tails are skipped
+SCAN_LIMIT = 16384
+
+# Classification only needs a few headers and the start of the body, so
+# messages are fetched partially (PEEK also leaves the \Seen flag alone)
+FETCH_PARTS = ('(BODY.PEEK[HEADER.FIELDS (FROM SUBJECT CONTENT-TYPE CONTENT-TRANSFER-ENCODING)] '
+               f'BODY.PEEK[TEXT]<0.{SCAN_LIMIT}>)')
 
 
 class ReplyHandler:
@@ -27,6 +79,15 @@ class ReplyHandler:
     - Comprehensive logging
     """
     
+    # Buffered log entries are flushed to disk after this many writes
+    LOG_FLUSH_EVERY = 100
+    
+    # UIDs fetched per IMAP round-trip
+    FETCH_BATCH_SIZE = 100
+    
+    # Servers may drop an IDLE after 30 minutes, so it is renewed before that
+    IDLE_TIMEOUT = 29 * 60
+    
     def __init__(self,
                  imap_server: Optional[str] = None,
                  imap_user: Optional[str] = None,
@@ -54,85 +115,362 @@ class ReplyHandler:
         # Setup directories
         self.contacts_dir = Path(contacts_dir)
         self.tracking_dir = Path(tracking_dir)
-        self.contacts_dir.mkdir(exist_ok=True)
-        self.tracking_dir.mkdir(exist_ok=True)
+        _ensure_dir(self.contacts_dir)
+        _ensure_dir(self.tracking_dir)
         
         # File paths
         self.suppression_file = self.contacts_dir / "suppression_list.json"
+        self.suppression_journal = self.contacts_dir / "suppression_list.jsonl"
         self.reply_log_file = self.tracking_dir / "reply_log.jsonl"
         self.bounce_log_file = self.tracking_dir / "bounce_log.jsonl"
         
+        # Log files stay open in append mode for the handler's lifetime
+        self._log_handles = {}
+        self._log_writes = 0
+        
+        # IMAP connection is kept open across polls; with CONDSTORE, later
+        # polls of a folder only search messages changed since the last one
+        self._mail = None
+        self._condstore = False
+        self._last_modseq: Dict[str, int] = {}
+        
+        # Suppression list is cached until suppression_list.json changes on
+        # disk; additions are appended to the journal and folded into
+        # suppression_list.json by compact()
+        self._suppression_cache: Optional[Set[str]] = None
+        self._suppression_signature: Optional[Tuple[int, int]] = None
+        self._suppression_dirty = False
+        atexit.register(self.close)
+        
         # Unsubscribe keywords
-        self.unsubscribe_keywords = [
+        self.unsubscribe_keywords = (
             'unsubscribe', 'opt out', 'opt-out', 'remove me',
             'stop sending', 'no more emails', 'take me off',
             'stop emailing', 'unsubscribe me', 'remove from list',
             'take me off your list', 'no longer interested',
             'stop contacting', 'do not contact', 'cease contact'
-        ]
+        )
         
         # Bounce indicators
-        self.bounce_indicators = [
+        self.bounce_indicators = (
             'delivery failed', 'undeliverable', 'mail delivery failed',
             'returned mail', 'delivery status notification',
             'user unknown', 'mailbox full', 'address not found',
             'recipient address rejected', 'smtp error', 'permanent error'
-        ]
+        )
+        
+        # Reply categorization keywords
+        self.ooo_keywords = ('out of office', 'automatic reply', 'away from office', 
+                             'vacation', 'auto-reply', 'out of the office')
+        self.interested_keywords = ('interested', 'tell me more', 'sounds good', 
+                                    'let\'s talk', 'schedule', 'call me')
+        self.not_interested_keywords = ('not interested', 'no thank', 'not at this time',
+                                        'no thanks', 'pass on this')
+        
+        # Categories in priority order; the first one with a keyword hit wins.
+        # Keywords are lowercased here once, as the scanned text is lowercased.
+        self._keyword_categories = tuple(
+            (category, tuple(keyword.lower() for keyword in keywords))
+            for category, keywords in (
+                ('unsubscribe', self.unsubscribe_keywords),
+                ('bounce', self.bounce_indicators),
+                ('out_of_office', self.ooo_keywords),
+                ('interested', self.interested_keywords),
+                ('not_interested', self.not_interested_keywords),
+            )
+        )
+        self._automaton = self._build_automaton() if AHOCORASICK_AVAILABLE else None
     
-    def _load_suppression_list(self) -> Set[str]:
-        """Load current suppression list"""
-        if not self.suppression_file.exists():
-            return set()
+    def _build_automaton(self):
+        """One Aho-Corasick automaton over every category's keywords"""
+        automaton = ahocorasick.Automaton()
+        for category, keywords in self._keyword_categories:
+            for index, keyword in enumerate(keywords):
+                hits = automaton.get(keyword, [])
+                hits.append((category, index, keyword))
+                automaton.add_word(keyword, hits)
+        automaton.make_automaton()
+        return automaton
+    
+    def _normalize(self, subject: str, body: str) -> Tuple[str, str]:
+        """Lowercased subject and body that the keyword scans run on"""
+        return subject.lower(), body.lower()
+    
+    def _keyword_hits(self, texts: Tuple[str, ...],
+                      categories: Optional[Set[str]] = None,
+                      first_only: bool = False) -> Dict[str, str]:
+        """
+        Scan the normalized subject and body for all keyword lists
         
+        The texts are scanned separately, which avoids building a
+        body-sized subject+body copy. With first_only, a hit on the
+        highest-priority category in the subject settles the result
+        before the body is read. Without the automaton, categories are
+        scanned one by one in priority order, so only the requested ones
+        are checked, stopping at the first hit when first_only is set.
+        
+        Returns:
+            Dict of category -> first matching keyword (in list order)
+        """
+        hits = {}
+        
+        if self._automaton is not None:
+            top = next(category for category, _ in self._keyword_categories
+                       if categories is None or category in categories)
+            best = {}
+            for text in texts:
+                for _, matches in self._automaton.iter(text):
+                    for category, index, keyword in matches:
+                        if category not in best or index < best[category][0]:
+                            best[category] = (index, keyword)
+                if first_only and top in best:
+                    break
+            return {category: keyword for category, (_, keyword) in best.items()}
+        
+        for category, keywords in self._keyword_categories:
+            if categories is not None and category not in categories:
+                continue
+            for keyword in keywords:
+                if any(keyword in text for text in texts):
+                    hits[category] = keyword
+                    if first_only:
+                        return hits
+                    break
+        return hits
+    
+    def _suppression_file_signature(self) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) of suppression_list.json, or None if it does not exist"""
         try:
-            with open(self.suppression_file, 'r') as f:
-                data = json.load(f)
-                return set(email.lower() for email in data.get('suppressed_emails', []))
-        except Exception as e:
-            print(f"⚠️  Warning: Could not load suppression list: {e}")
-            return set()
+            st = self.suppression_file.stat()
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+    
+    def _load_suppression_list(self, reload: bool = False) -> Set[str]:
+        """
+        Load current suppression list plus any journaled additions
+        
+        The result is cached until suppression_list.json changes on disk,
+        so additions made by other processes are picked up.
+        """
+        signature = self._suppression_file_signature()
+        if (self._suppression_cache is not None and not reload
+                and signature == self._suppression_signature):
+            return self._suppression_cache
+        
+        suppressed = set()
+        if signature is not None:
+            try:
+                with open(self.suppression_file, 'r') as f:
+                    data = json.load(f)
+                    suppressed = set(email.lower() for email in data.get('suppressed_emails', []))
+            except Exception as e:
+                print(f"⚠️  Warning: Could not load suppression list: {e}")
+        
+        # Additions left in the journal (this run's, or an interrupted run's) still count
+        journal = self._log_handles.get(self.suppression_journal)
+        if journal is not None:
+            journal.flush()
+        if self.suppression_journal.exists():
+            try:
+                with open(self.suppression_journal, 'r') as f:
+                    for line in f:
+                        if line.strip():
+                            suppressed.add(json.loads(line)['email'])
+                            self._suppression_dirty = True
+            except Exception as e:
+                print(f"⚠️  Warning: Could not read suppression journal: {e}")
+        
+        self._suppression_cache = suppressed
+        self._suppression_signature = signature
+        return suppressed
+    
+    def _append_suppression(self, email_addr: str, reason: str) -> bool:
+        """
+        Add an email to the suppression set and journal it (one appended line)
+        
+        Returns:
+            True if the email was newly suppressed, False if already listed
+        """
+        suppression_list = self._load_suppression_list()
+        size = len(suppression_list)
+        suppression_list.add(email_addr)
+        if len(suppression_list) == size:
+            return False
+        
+        self._append_log(self.suppression_journal, {
+            'email': email_addr,
+            'added': datetime.now().isoformat(),
+            'reason': reason
+        })
+        self._suppression_dirty = True
+        return True
     
     def _save_suppression_list(self, emails: Set[str]):
         """Save updated suppression list"""
         with open(self.suppression_file, 'w') as f:
             json.dump({
-                'suppressed_emails': sorted(list(emails)),
+                'suppressed_emails': sorted(emails),
                 'last_updated': datetime.now().isoformat(),
                 'count': len(emails)
-            }, f, indent=2)
+            }, f, separators=(',', ':'))
+    
+    def compact(self):
+        """Fold journaled suppressions into suppression_list.json and clear the journal"""
+        if not self._suppression_dirty:
+            return
+        # Re-read from disk so addresses added by other processes are kept
+        self._save_suppression_list(self._load_suppression_list(reload=True))
+        self._suppression_signature = self._suppression_file_signature()
+        journal = self._log_handles.pop(self.suppression_journal, None)
+        if journal is not None:
+            journal.close()
+        self.suppression_journal.unlink(missing_ok=True)
+        self._suppression_dirty = False
+    
+    def _append_log(self, path: Path, entry: Dict):
+        """Append one JSON line to a log file, opening it on first use"""
+        f = self._log_handles.get(path)
+        if f is None:
+            f = self._log_handles[path] = open(path, 'a', buffering=1 << 16)
+        f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        
+        # Flush periodically so a crash loses at most a few entries
+        self._log_writes += 1
+        if self._log_writes % self.LOG_FLUSH_EVERY == 0:
+            self.flush()
     
     def _log_reply(self, from_email: str, subject: str, 
                    category: str, body_preview: str = ""):
         """Log a reply for tracking"""
-        with open(self.reply_log_file, 'a') as f:
-            json.dump({
-                'timestamp': datetime.now().isoformat(),
-                'from': from_email,
-                'subject': subject,
-                'category': category,
-                'body_preview': body_preview[:200] if body_preview else ""
-            }, f)
-            f.write('\n')
+        self._append_log(self.reply_log_file, {
+            'timestamp': datetime.now().isoformat(),
+            'from': from_email,
+            'subject': subject,
+            'category': category,
+            'body_preview': body_preview[:200] if body_preview else ""
+        })
     
     def _log_bounce(self, email_addr: str, reason: str):
         """Log a bounced email"""
-        with open(self.bounce_log_file, 'a') as f:
-            json.dump({
-                'timestamp': datetime.now().isoformat(),
-                'email': email_addr,
-                'reason': reason
-            }, f)
-            f.write('\n')
+        self._append_log(self.bounce_log_file, {
+            'timestamp': datetime.now().isoformat(),
+            'email': email_addr,
+            'reason': reason
+        })
+    
+    def flush(self):
+        """Write buffered log entries to disk"""
+        for f in self._log_handles.values():
+            f.flush()
+    
+    def _connection(self) -> imaplib.IMAP4_SSL:
+        """Return the open IMAP connection, connecting (again) when needed"""
+        if self._mail is not None:
+            try:
+                self._mail.noop()
+                return self._mail
+            except (imaplib.IMAP4.error, OSError):
+                self._mail = None
+        
+        print(f"📧 Connecting to {self.imap_server}:{self.imap_port}...")
+        mail = imaplib.IMAP4_SSL(self.imap_server, self.imap_port)
+        mail.login(self.imap_user, self.imap_password)
+        
+        self._condstore = False
+        self._last_modseq.clear()
+        capabilities = getattr(mail, 'capabilities', ())
+        if 'CONDSTORE' in capabilities and 'ENABLE' in capabilities:
+            try:
+                self._condstore = mail.enable('CONDSTORE')[0] == 'OK'
+            except imaplib.IMAP4.error:
+                pass
+        
+        self._mail = mail
+        return mail
+    
+    def _disconnect(self):
+        """Log out of the IMAP connection if one is open"""
+        if self._mail is not None:
+            try:
+                self._mail.logout()
+            except (imaplib.IMAP4.error, OSError):
+                pass
+            self._mail = None
+    
+    def idle(self, folder: str = 'INBOX', timeout: Optional[int] = None) -> bool:
+        """
+        Wait for the server to push new mail with IMAP IDLE
+        
+        Args:
+            folder: Email folder to watch
+            timeout: Seconds to wait at most (default: IDLE_TIMEOUT)
+            
+        Returns:
+            True when the server reported new mail, False on timeout
+        """
+        timeout = self.IDLE_TIMEOUT if timeout is None else timeout
+        mail = self._connection()
+        if 'IDLE' not in getattr(mail, 'capabilities', ()):
+            # No push support: wait out the interval and let the caller poll
+            time.sleep(timeout)
+            return False
+        
+        mail.select(folder)
+        tag = mail._new_tag()
+        mail.send(tag + b' IDLE\r\n')
+        if not mail.readline().startswith(b'+'):
+            return False
+        
+        # select() only sees the socket; an update that arrived together
+        # with the continuation line waits in the reader until DONE below,
+        # which delays it to the next poll but never loses it
+        changed = False
+        deadline = time.monotonic() + timeout
+        while not changed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            readable, _, _ = select.select([mail.sock], [], [], remaining)
+            if not readable:
+                break
+            line = mail.readline()
+            if not line:
+                raise imaplib.IMAP4.abort('connection closed during IDLE')
+            changed = b'EXISTS' in line or b'RECENT' in line
+        
+        mail.send(b'DONE\r\n')
+        while True:
+            line = mail.readline()
+            if not line:
+                raise imaplib.IMAP4.abort('connection closed after IDLE')
+            if line.startswith(tag):
+                return changed
+    
+    def close(self):
+        """Compact the suppression list, log out, then flush and close the log files"""
+        self.compact()
+        self._disconnect()
+        for f in self._log_handles.values():
+            f.close()
+        self._log_handles.clear()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
     
     def _extract_email_address(self, from_header: str) -> str:
         """Extract email address from 'Name <email@domain.com>' format"""
         # Try to find email in angle brackets
-        match = re.search(r'<([^>]+)>', from_header)
+        match = ANGLE_RE.search(from_header)
         if match:
             return match.group(1).lower().strip()
         
         # Try to find email pattern
-        match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', from_header)
+        match = EMAIL_RE.search(from_header)
         if match:
             return match.group(0).lower().strip()
         
@@ -140,76 +478,171 @@ class ReplyHandler:
     
     def _is_unsubscribe_request(self, subject: str, body: str) -> bool:
         """Check if email is an unsubscribe request"""
-        combined = f"{subject} {body}".lower()
-        return any(keyword in combined for keyword in self.unsubscribe_keywords)
+        return self._is_unsubscribe_on(self._normalize(subject, body))
+    
+    def _is_unsubscribe_on(self, texts: Tuple[str, ...]) -> bool:
+        """_is_unsubscribe_request on already normalized texts"""
+        return 'unsubscribe' in self._keyword_hits(texts, {'unsubscribe'}, first_only=True)
     
     def _is_bounce(self, subject: str, body: str, from_email: str) -> Tuple[bool, str]:
         """
         Check if email is a bounce notification
         
+        Bounce indicators in subject/body decide; the sender (MAILER-DAEMON,
+        postmaster or otherwise) never changes the outcome, so it isn't read.
+        
         Returns:
             Tuple of (is_bounce: bool, reason: str)
         """
-        combined = f"{subject} {body}".lower()
-        
-        # Check sender (bounces often come from MAILER-DAEMON)
-        if 'mailer-daemon' in from_email.lower() or 'postmaster' in from_email.lower():
-            for indicator in self.bounce_indicators:
-                if indicator in combined:
-                    return True, indicator
-        
-        # Check for bounce indicators in subject/body
-        for indicator in self.bounce_indicators:
-            if indicator in combined:
-                return True, indicator
+        return self._is_bounce_on(self._normalize(subject, body))
+    
+    def _is_bounce_on(self, texts: Tuple[str, ...]) -> Tuple[bool, str]:
+        """_is_bounce on already normalized texts"""
+        # Both texts are scanned so the reported indicator is the first in list order
+        indicator = self._keyword_hits(texts, {'bounce'}).get('bounce')
+        if indicator:
+            return True, indicator
         
         return False, ""
     
     def _extract_bounced_email(self, body: str) -> Optional[str]:
         """Try to extract the email address that bounced from bounce message"""
-        # Look for common patterns in bounce messages
-        patterns = [
-            r'(?:to|for|recipient|address)[\s:]+<?([a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)>?',
-            r'<?([a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)>?.*(?:not found|unknown|rejected)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, body, re.IGNORECASE)
+        for pattern in BOUNCE_PATTERNS:
+            match = pattern.search(body)
             if match:
                 return match.group(1).lower()
         
         return None
     
     def _categorize_reply(self, subject: str, body: str, from_email: str) -> str:
-        """Categorize the reply type"""
-        if self._is_unsubscribe_request(subject, body):
-            return "unsubscribe"
-        
-        is_bounce, _ = self._is_bounce(subject, body, from_email)
-        if is_bounce:
-            return "bounce"
-        
-        # Check for out-of-office
-        ooo_keywords = ['out of office', 'automatic reply', 'away from office', 
-                        'vacation', 'auto-reply', 'out of the office']
-        combined = f"{subject} {body}".lower()
-        if any(keyword in combined for keyword in ooo_keywords):
-            return "out_of_office"
-        
-        # Check for interested replies
-        interested_keywords = ['interested', 'tell me more', 'sounds good', 
-                              'let\'s talk', 'schedule', 'call me']
-        if any(keyword in combined for keyword in interested_keywords):
-            return "interested"
-        
-        # Check for not interested
-        not_interested_keywords = ['not interested', 'no thank', 'not at this time',
-                                   'no thanks', 'pass on this']
-        if any(keyword in combined for keyword in not_interested_keywords):
-            return "not_interested"
+        """Categorize the reply type (unsubscribe > bounce > out of office > interested > not interested)"""
+        hits = self._keyword_hits(self._normalize(subject, body), first_only=True)
+        for category, _ in self._keyword_categories:
+            if category in hits:
+                return category
         
         return "general_reply"
     
+    def _process_one(self, item: Tuple[bytes, List]) -> Dict:
+        """
+        Parse and classify one fetched message
+        
+        Only reads handler state, so it is safe to run off the main thread.
+        
+        Returns:
+            Dict with the message's uid, sender, subject, category, body
+            preview and bounced address, or its uid and an error
+        """
+        email_id, msg_data = item
+        try:
+            # Parse email
+            msg = parse_partial(msg_data)
+            
+            # Extract sender
+            from_header = msg.get('From', '')
+            from_email = self._extract_email_address(from_header)
+            
+            # Extract subject
+            subject = decode_header_value(msg.get('Subject', ''))
+            
+            # Extract body
+            body = decode_part(first_text_part(msg))
+            body_for_scan = body[:SCAN_LIMIT]
+            
+            # Categorize the reply
+            category = self._categorize_reply(subject, body_for_scan, from_email)
+            
+            # Try to extract the actual bounced email
+            bounced_email = None
+            if category == "bounce":
+                bounced_email = self._extract_bounced_email(body_for_scan)
+        except Exception as e:
+            return {'uid': email_id, 'error': str(e)}
+        
+        return {
+            'uid': email_id,
+            'from': from_email,
+            'subject': subject,
+            'category': category,
+            'preview': body[:200],
+            'bounced_email': bounced_email
+        }
+    
+    def _process_batch(self, fetched: List) -> List[Dict]:
+        """Parse and classify every message in a FETCH response"""
+        return [self._process_one(item) for item in split_fetch(fetched)]
+    
+    def _apply_batch(self, mail: imaplib.IMAP4_SSL, processed_batch: List[Dict],
+                     results: Dict, process_bounces: bool, mark_read: bool):
+        """Record a classified batch: suppressions, logs, counters and read flags"""
+        processed = []
+        for item in processed_batch:
+            if 'error' in item:
+                results['errors'].append(f"Error processing email: {item['error']}")
+                print(f"⚠️  Error processing email: {item['error']}")
+                continue
+            
+            try:
+                from_email = item['from']
+                subject = item['subject']
+                category = item['category']
+                preview = item['preview']
+                
+                # Handle based on category
+                if category == "unsubscribe":
+                    print(f"🚫 Unsubscribe: {from_email}")
+                    if self._append_suppression(from_email, "unsubscribe"):
+                        results['new_suppressions'].append(from_email)
+                    results['unsubscribes'] += 1
+                
+                elif category == "bounce" and process_bounces:
+                    print(f"📛 Bounce detected: {from_email}")
+                    # The actual bounced email, if it could be extracted
+                    bounced_email = item['bounced_email']
+                    if bounced_email:
+                        print(f"   Bounced email: {bounced_email}")
+                        if self._append_suppression(bounced_email, "bounce"):
+                            results['new_suppressions'].append(bounced_email)
+                        self._log_bounce(bounced_email, "bounce")
+                    results['bounces'] += 1
+                
+                elif category == "interested":
+                    print(f"✨ Interested reply: {from_email}")
+                    results['interested_emails'].append({
+                        'email': from_email,
+                        'subject': subject,
+                        'body_preview': preview
+                    })
+                    results['interested'] += 1
+                
+                elif category == "not_interested":
+                    print(f"👎 Not interested: {from_email}")
+                    # Optionally suppress these too
+                    if self._append_suppression(from_email, "not_interested"):
+                        results['new_suppressions'].append(from_email)
+                    results['not_interested'] += 1
+                
+                elif category == "out_of_office":
+                    print(f"🏖️  Out of office: {from_email}")
+                    results['out_of_office'] += 1
+                
+                else:
+                    print(f"💬 General reply: {from_email}")
+                    results['general_replies'] += 1
+                
+                # Log the reply
+                self._log_reply(from_email, subject, category, preview)
+                
+                processed.append(item['uid'])
+                
+            except Exception as e:
+                results['errors'].append(f"Error processing email: {str(e)}")
+                print(f"⚠️  Error processing email: {e}")
+        
+        # Mark the whole batch as read if requested
+        if mark_read and processed:
+            mail.uid('STORE', b','.join(processed), '+FLAGS', '\\Seen')
+    
     def check_replies(self, 
                      days_back: int = 7,
                      mark_read: bool = False,
@@ -246,16 +679,21 @@ class ReplyHandler:
         }
         
         try:
-            # Connect to IMAP
-            print(f"📧 Connecting to {self.imap_server}:{self.imap_port}...")
-            mail = imaplib.IMAP4_SSL(self.imap_server, self.imap_port)
-            mail.login(self.imap_user, self.imap_password)
+            # Connect to IMAP (reusing the connection from an earlier poll)
+            mail = self._connection()
             
             # Select folder
             status, _ = mail.select(folder)
             if status != 'OK':
                 return {'error': f'Could not select folder: {folder}'}
             
+            # Changes up to this point are covered by this poll
+            highest_modseq = None
+            if self._condstore:
+                _, data = mail.response('HIGHESTMODSEQ')
+                if data and data[0]:
+                    highest_modseq = int(data[0])
+            
             # Build search criteria
             if days_back > 0:
                 since_date = (datetime.now() - timedelta(days=days_back)).strftime('%d-%b-%Y')
@@ -263,8 +701,13 @@ class ReplyHandler:
             else:
                 search_criteria = 'UNSEEN'
             
-            # Search for emails
-            status, messages = mail.search(None, search_criteria)
+            # Skip messages unchanged since the previous poll of this folder
+            last_modseq = self._last_modseq.get(folder)
+            if last_modseq is not None:
+                search_criteria = f'{search_criteria} MODSEQ {last_modseq + 1}'
+            
+            # Search for emails (UIDs stay stable across commands, sequence numbers don't)
+            status, messages = mail.uid('SEARCH', None, search_criteria)
             
             if status != 'OK':
                 return {'error': 'Could not search mailbox'}
@@ -274,119 +717,52 @@ class ReplyHandler:
             
             if not email_ids:
                 print("✅ No emails to process")
-                mail.logout()
+                if highest_modseq is not None:
+                    self._last_modseq[folder] = highest_modseq
                 return results
             
             print(f"📬 Found {len(email_ids)} emails to process")
             
             # Load current suppression list
-            suppression_list = self._load_suppression_list()
+            self._load_suppression_list()
             
-            # Process each email
-            for email_id in email_ids:
-                try:
-                    # Fetch email
-                    status, msg_data = mail.fetch(email_id, '(RFC822)')
-                    
-                    if status != 'OK':
-                        continue
-                    
-                    # Parse email
-                    raw_email = msg_data[0][1]
-                    msg = email.message_from_bytes(raw_email)
-                    
-                    # Extract sender
-                    from_header = msg.get('From', '')
-                    from_email = self._extract_email_address(from_header)
-                    
-                    # Extract subject
-                    subject = msg.get('Subject', '')
-                    
-                    # Extract body
-                    body = ''
-                    if msg.is_multipart():
-                        for part in msg.walk():
-                            if part.get_content_type() == 'text/plain':
-                                try:
-                                    body = part.get_payload(decode=True).decode('utf-8', errors='ignore')
-                                    break
-                                except:
-                                    pass
-                    else:
-                        try:
-                            body = msg.get_payload(decode=True).decode('utf-8', errors='ignore')
-                        except:
-                            body = str(msg.get_payload())
-                    
-                    # Categorize the reply
-                    category = self._categorize_reply(subject, body, from_email)
-                    
-                    # Handle based on category
-                    if category == "unsubscribe":
-                        print(f"🚫 Unsubscribe: {from_email}")
-                        if from_email not in suppression_list:
-                            suppression_list.add(from_email)
-                            results['new_suppressions'].append(from_email)
-                        results['unsubscribes'] += 1
-                        
-                    elif category == "bounce" and process_bounces:
-                        print(f"📛 Bounce detected: {from_email}")
-                        # Try to extract the actual bounced email
-                        bounced_email = self._extract_bounced_email(body)
-                        if bounced_email:
-                            print(f"   Bounced email: {bounced_email}")
-                            if bounced_email not in suppression_list:
-                                suppression_list.add(bounced_email)
-                                results['new_suppressions'].append(bounced_email)
-                            self._log_bounce(bounced_email, "bounce")
-                        results['bounces'] += 1
-                        
-                    elif category == "interested":
-                        print(f"✨ Interested reply: {from_email}")
-                        results['interested_emails'].append({
-                            'email': from_email,
-                            'subject': subject,
-                            'body_preview': body[:200]
-                        })
-                        results['interested'] += 1
-                        
-                    elif category == "not_interested":
-                        print(f"👎 Not interested: {from_email}")
-                        # Optionally suppress these too
-                        if from_email not in suppression_list:
-                            suppression_list.add(from_email)
-                            results['new_suppressions'].append(from_email)
-                        results['not_interested'] += 1
-                        
-                    elif category == "out_of_office":
-                        print(f"🏖️  Out of office: {from_email}")
-                        results['out_of_office'] += 1
-                        
-                    else:
-                        print(f"💬 General reply: {from_email}")
-                        results['general_replies'] += 1
-                    
-                    # Log the reply
-                    self._log_reply(from_email, subject, category, body[:200])
-                    
-                    # Mark as read if requested
-                    if mark_read:
-                        mail.store(email_id, '+FLAGS', '\\Seen')
-                        
-                except Exception as e:
-                    results['errors'].append(f"Error processing email: {str(e)}")
-                    print(f"⚠️  Error processing email: {e}")
+            # Fetch emails in batches, one round-trip per batch. A background
+            # thread parses and classifies each batch while the next one is
+            # fetched; results are applied here, in order.
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                pending = None
+                for start in range(0, len(email_ids), self.FETCH_BATCH_SIZE):
+                    batch = email_ids[start:start + self.FETCH_BATCH_SIZE]
+                    current = None
+                    try:
+                        status, fetched = mail.uid('FETCH', b','.join(batch), FETCH_PARTS)
+                        if status == 'OK' and fetched:
+                            current = executor.submit(self._process_batch, fetched)
+                        else:
+                            error = f"Could not fetch {len(batch)} emails (FETCH {status})"
+                            results['errors'].append(error)
+                            print(f"⚠️  {error}")
+                    finally:
+                        # Already classified messages are applied even if FETCH failed
+                        if pending is not None:
+                            self._apply_batch(mail, pending.result(), results, process_bounces, mark_read)
+                        pending = current
+                
+                if pending is not None:
+                    self._apply_batch(mail, pending.result(), results, process_bounces, mark_read)
             
             # Save updated suppression list
             if results['new_suppressions']:
-                self._save_suppression_list(suppression_list)
+                self.compact()
                 print(f"\n✅ Added {len(results['new_suppressions'])} emails to suppression list")
             
-            # Logout
-            mail.logout()
+            if highest_modseq is not None:
+                self._last_modseq[folder] = highest_modseq
             print("\n✅ Done processing emails")
             
         except Exception as e:
+            # The connection may be broken; the next poll reconnects
+            self._disconnect()
             results['errors'].append(str(e))
             print(f"❌ Error connecting to email: {e}")
         
@@ -394,12 +770,9 @@ class ReplyHandler:
     
     def add_suppression(self, email_addr: str, reason: str = "manual"):
         """Manually add an email to suppression list"""
-        suppression_list = self._load_suppression_list()
         email_addr = email_addr.lower().strip()
         
-        if email_addr not in suppression_list:
-            suppression_list.add(email_addr)
-            self._save_suppression_list(suppression_list)
+        if self._append_suppression(email_addr, reason):
             self._log_reply(email_addr, "", f"suppressed_{reason}", "")
             print(f"✅ Added {email_addr} to suppression list ({reason})")
         else:
@@ -427,6 +800,9 @@ Examples:
   # Show current suppression stats
   python reply_handler.py --show-stats
   
+  # Keep checking, woken by the server when new mail arrives
+  python reply_handler.py --days 0 --watch
+  
 Environment variables needed:
   IMAP_SERVER - IMAP server (e.g., imap.gmail.com)
   SMTP_USER or IMAP_USER - Your email username
@@ -445,89 +821,105 @@ Environment variables needed:
                        help='Email folder to check (default: INBOX)')
     parser.add_argument('--no-bounces', action='store_true',
                        help='Don\'t process bounce messages')
+    parser.add_argument('--watch', action='store_true',
+                       help='Keep running and check again when new mail arrives (IMAP IDLE)')
     
     args = parser.parse_args()
     
-    handler = ReplyHandler()
-    
-    if args.show_stats:
-        # Show statistics
-        suppression_list = handler._load_suppression_list()
-        print(f"\n📊 Suppression List Statistics")
-        print(f"{'='*50}")
-        print(f"Total suppressed emails: {len(suppression_list)}")
-        
-        if suppression_list:
-            print(f"\nRecent additions (last 10):")
-            for email_addr in sorted(list(suppression_list))[-10:]:
-                print(f"   • {email_addr}")
-        
-        # Show reply log stats if exists
-        if handler.reply_log_file.exists():
-            print(f"\n📈 Reply Statistics")
+    with ReplyHandler() as handler:
+        if args.show_stats:
+            # Show statistics
+            suppression_list = handler._load_suppression_list()
+            print(f"\n📊 Suppression List Statistics")
             print(f"{'='*50}")
-            categories = {}
-            with open(handler.reply_log_file, 'r') as f:
-                for line in f:
-                    try:
-                        entry = json.loads(line)
-                        cat = entry.get('category', 'unknown')
-                        categories[cat] = categories.get(cat, 0) + 1
-                    except:
-                        pass
+            print(f"Total suppressed emails: {len(suppression_list)}")
             
-            for category, count in sorted(categories.items(), key=lambda x: x[1], reverse=True):
-                print(f"   {category}: {count}")
-    
-    elif args.add_suppression:
-        # Manually add to suppression
-        handler.add_suppression(args.add_suppression, reason="manual")
-    
-    else:
-        # Check for replies
-        print(f"\n🔍 Checking for email replies...")
-        print(f"{'='*50}")
-        
-        results = handler.check_replies(
-            days_back=args.days,
-            mark_read=args.mark_read,
-            folder=args.folder,
-            process_bounces=not args.no_bounces
-        )
+            if suppression_list:
+                print(f"\nRecent additions (last 10):")
+                for email_addr in sorted(list(suppression_list))[-10:]:
+                    print(f"   • {email_addr}")
+            
+            # Show reply log stats if exists
+            if handler.reply_log_file.exists():
+                print(f"\n📈 Reply Statistics")
+                print(f"{'='*50}")
+                categories = Counter()
+                with open(handler.reply_log_file, 'rb') as f:
+                    for line in f:
+                        match = CATEGORY_RE.search(line)
+                        if match:
+                            categories[match.group(1).decode('utf-8', errors='replace')] += 1
+                            continue
+                        # Fall back to a full parse for lines the pattern misses
+                        try:
+                            categories[json.loads(line).get('category', 'unknown')] += 1
+                        except (ValueError, AttributeError):
+                            pass
+                
+                for category, count in categories.most_common():
+                    print(f"   {category}: {count}")
         
-        if 'error' in results:
-            print(f"\n❌ Error: {results['error']}")
-            return
+        elif args.add_suppression:
+            # Manually add to suppression
+            handler.add_suppression(args.add_suppression, reason="manual")
         
-        # Display results
-        print(f"\n📊 Processing Results")
-        print(f"{'='*50}")
-        print(f"Emails checked:        {results['checked']}")
-        print(f"Unsubscribes:         {results['unsubscribes']}")
-        print(f"Bounces:              {results['bounces']}")
-        print(f"Interested replies:   {results['interested']}")
-        print(f"Not interested:       {results['not_interested']}")
-        print(f"Out of office:        {results['out_of_office']}")
-        print(f"General replies:      {results['general_replies']}")
-        print(f"New suppressions:     {len(results['new_suppressions'])}")
-        
-        if results['new_suppressions']:
-            print(f"\n🚫 Newly suppressed emails:")
-            for email_addr in results['new_suppressions']:
-                print(f"   • {email_addr}")
-        
-        if results['interested_emails']:
-            print(f"\n✨ Interested replies (check these!):")
-            for reply in results['interested_emails']:
-                print(f"   • {reply['email']}")
-                print(f"     Subject: {reply['subject']}")
-                print(f"     Preview: {reply['body_preview'][:100]}...")
-                print()
-        
-        if results['errors']:
-            print(f"\n⚠️  Errors encountered: {len(results['errors'])}")
-            for error in results['errors'][:5]:  # Show first 5
-                print(f"   • {error}")
+        else:
+            while True:
+                # Check for replies
+                print(f"\n🔍 Checking for email replies...")
+                print(f"{'='*50}")
+                
+                results = handler.check_replies(
+                    days_back=args.days,
+                    mark_read=args.mark_read,
+                    folder=args.folder,
+                    process_bounces=not args.no_bounces
+                )
+                
+                if 'error' in results:
+                    print(f"\n❌ Error: {results['error']}")
+                    return
+                
+                # Display results
+                print(f"\n📊 Processing Results")
+                print(f"{'='*50}")
+                print(f"Emails checked:        {results['checked']}")
+                print(f"Unsubscribes:         {results['unsubscribes']}")
+                print(f"Bounces:              {results['bounces']}")
+                print(f"Interested replies:   {results['interested']}")
+                print(f"Not interested:       {results['not_interested']}")
+                print(f"Out of office:        {results['out_of_office']}")
+                print(f"General replies:      {results['general_replies']}")
+                print(f"New suppressions:     {len(results['new_suppressions'])}")
+                
+                if results['new_suppressions']:
+                    print(f"\n🚫 Newly suppressed emails:")
+                    for email_addr in results['new_suppressions']:
+                        print(f"   • {email_addr}")
+                
+                if results['interested_emails']:
+                    print(f"\n✨ Interested replies (check these!):")
+                    for reply in results['interested_emails']:
+                        print(f"   • {reply['email']}")
+                        print(f"     Subject: {reply['subject']}")
+                        print(f"     Preview: {reply['body_preview'][:100]}...")
+                        print()
+                
+                if results['errors']:
+                    print(f"\n⚠️  Errors encountered: {len(results['errors'])}")
+                    for error in results['errors'][:5]:  # Show first 5
+                        print(f"   • {error}")
+                
+                if not args.watch:
+                    break
+                
+                print(f"\n⏳ Waiting for new mail...")
+                try:
+                    handler.idle(args.folder)
+                except (imaplib.IMAP4.error, OSError) as e:
+                    # Reconnect on the next poll
+                    print(f"⚠️  IDLE interrupted: {e}")
+                    handler._disconnect()
 
 
 if __name__ == "__main__":
@@ -1,25 +1,67 @@
-import os, imaplib, email, re, json
+import os, sys, imaplib, email, re
+
+# Shared IMAP helpers live next to this script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+from imap_utils import decode_header_value, decode_part, first_text_part, parse_partial, split_fetch
 
 # Regex for thread IDs and bounce detection
 TID_RE = re.compile(r"\[TID:([a-f0-9\-]{1,16})\]", re.IGNORECASE)
 BOUNCE_RE = re.compile(r"(undeliverable|mail delivery|failure notice|returned mail)", re.IGNORECASE)
 
-# Configurable UID state file (defaults to tracking/.uids.json)
-UID_STATE_FILE = os.path.join(
-    os.environ.get("TRACKING_DIR", "tracking"),
-    ".uids.json"
-)
+# Only the headers and the first 8 KiB of body text are fetched; that is
+# enough for TID/bounce detection and skips attachments
+FETCH_PARTS = ("(BODY.PEEK[HEADER.FIELDS (FROM SUBJECT CONTENT-TYPE CONTENT-TRANSFER-ENCODING)] "
+               "BODY.PEEK[TEXT]<0.8192>)")
+
+# UIDs fetched per IMAP round-trip
+FETCH_BATCH_SIZE = 100
+
+# Configurable UID state file (defaults to tracking/.uids.jsonl): one UID
+# per line, appended as replies are processed
+TRACKING_DIR = os.environ.get("TRACKING_DIR", "tracking")
+UID_STATE_FILE = os.path.join(TRACKING_DIR, ".uids.jsonl")
+# Earlier JSON-array state file. It recorded IMAP sequence numbers, not
+# UIDs, so it is deleted rather than merged
+LEGACY_UID_STATE_FILE = os.path.join(TRACKING_DIR, ".uids.json")
+
+_state_dir_ready = False
+
+def _ensure_state_dir():
+    """Create the UID state file's directory, once per process"""
+    global _state_dir_ready
+    if not _state_dir_ready:
+        os.makedirs(os.path.dirname(UID_STATE_FILE), exist_ok=True)
+        _state_dir_ready = True
 
 def _load_seen_uids():
+    """Return the set of processed UIDs and the state file's line count"""
+    seen, lines = set(), 0
+    if os.path.exists(LEGACY_UID_STATE_FILE):
+        os.remove(LEGACY_UID_STATE_FILE)
     if os.path.exists(UID_STATE_FILE):
         with open(UID_STATE_FILE, "r", encoding="utf-8") as f:
-            return set(json.load(f))
-    return set()
-
-def _save_seen_uids(seen):
-    os.makedirs(os.path.dirname(UID_STATE_FILE), exist_ok=True)
-    with open(UID_STATE_FILE, "w", encoding="utf-8") as f:
-        json.dump(list(seen), f, indent=2)
+            for line in f:
+                uid = line.strip()
+                if uid:
+                    seen.add(uid)
+                    lines += 1
+    return seen, lines
+
+def _append_seen_uids(uids):
+    _ensure_state_dir()
+    with open(UID_STATE_FILE, "a", encoding="utf-8") as f:
+        f.writelines(uid + "\n" for uid in uids)
+
+def _compact_seen_uids(seen):
+    """Rewrite the state file with one line per UID"""
+    _ensure_state_dir()
+    tmp_path = UID_STATE_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.writelines(uid + "\n" for uid in seen)
+    os.replace(tmp_path, UID_STATE_FILE)
 
 class ReplyTracker:
     def __init__(self, imap_host=None, imap_user=None, imap_pass=None, mailbox="INBOX", mark_seen=False):
@@ -35,71 +77,62 @@ class ReplyTracker:
         return m
 
     def _extract_body(self, msg):
-        body = ""
-        if msg.is_multipart():
-            for part in msg.walk():
-                ctype = part.get_content_type()
-                disp = str(part.get("Content-Disposition"))
-                if ctype == "text/plain" and "attachment" not in disp:
-                    charset = part.get_content_charset() or "utf-8"
-                    body += part.get_payload(decode=True).decode(charset, errors="ignore")
-            # fallback: use html if no plain text found
-            if not body:
-                for part in msg.walk():
-                    if part.get_content_type() == "text/html":
-                        charset = part.get_content_charset() or "utf-8"
-                        body = part.get_payload(decode=True).decode(charset, errors="ignore")
-                        break
-        else:
-            charset = msg.get_content_charset() or "utf-8"
-            body = msg.get_payload(decode=True).decode(charset, errors="ignore")
-        return body
+        return decode_part(first_text_part(msg))
 
     def fetch_replies(self):
-        seen = _load_seen_uids()
+        seen, seen_lines = _load_seen_uids()
         m = self._connect()
         m.select(self.mailbox)
-        result, data = m.search(None, "ALL")
+        result, data = m.uid("SEARCH", None, "ALL")
         if result != "OK":
             m.logout()
             return []
 
-        uids = data[0].split()
-        replies, new_seen = [], set(seen)
-
-        for uid in uids:
-            uid_str = uid.decode() if isinstance(uid, bytes) else str(uid)
-            if uid_str in seen:
-                continue  # already processed
+        # Already processed UIDs are skipped before fetching
+        uids = [uid for uid in data[0].split() if uid.decode() not in seen]
+        replies = []
 
-            res, msgdata = m.fetch(uid, "(RFC822)")
-            if res != "OK":
+        for start in range(0, len(uids), FETCH_BATCH_SIZE):
+            batch = uids[start:start + FETCH_BATCH_SIZE]
+            res, fetched = m.uid("FETCH", b",".join(batch), FETCH_PARTS)
+            if res != "OK" or not fetched:
                 continue
 
-            msg = email.message_from_bytes(msgdata[0][1])
-            subject = msg.get("Subject", "")
-            body = self._extract_body(msg)
+            fetched_uids = []
+            for uid, msgdata in split_fetch(fetched):
+                uid_str = uid.decode()
+                msg = parse_partial(msgdata)
+                subject = decode_header_value(msg.get("Subject", ""))
+                body = self._extract_body(msg)
+
+                # TID + bounce detection
+                match = TID_RE.search(subject) or TID_RE.search(body)
+                tid = match.group(1) if match else None
+                is_bounce = bool(BOUNCE_RE.search(subject) or BOUNCE_RE.search(body))
+
+                from_addr = email.utils.parseaddr(msg.get("From"))[1]
 
-            # TID + bounce detection
-            match = TID_RE.search(subject) or TID_RE.search(body)
-            tid = match.group(1) if match else None
-            is_bounce = bool(BOUNCE_RE.search(subject) or BOUNCE_RE.search(body))
+                replies.append({
+                    "uid": uid_str,
+                    "subject": subject,
+                    "body": body,
+                    "tid": tid,
+                    "from": from_addr,
+                    "bounce": is_bounce
+                })
 
-            from_addr = email.utils.parseaddr(msg.get("From"))[1]
+                fetched_uids.append(uid)
 
-            replies.append({
-                "uid": uid_str,
-                "subject": subject,
-                "body": body,
-                "tid": tid,
-                "from": from_addr,
-                "bounce": is_bounce
-            })
+            # Record the batch as processed with one append
+            new_uids = [uid.decode() for uid in fetched_uids]
+            _append_seen_uids(new_uids)
+            seen.update(new_uids)
+            seen_lines += len(new_uids)
 
-            new_seen.add(uid_str)
-            if self.mark_seen:
-                m.store(uid, "+FLAGS", "\\Seen")
+            if self.mark_seen and fetched_uids:
+                m.uid("STORE", b",".join(fetched_uids), "+FLAGS", "\\Seen")
 
         m.logout()
-        _save_seen_uids(new_seen)
+        if seen_lines > 2 * len(seen):
+            _compact_seen_uids(seen)
         return replies
@@ -3,15 +3,21 @@ Enhanced Smart Rate Limiter and Targeting System
 Advanced email sending optimization with spam prevention and reputation management
 """
 
+import atexit
 import json
+import re
 import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Set
-from collections import defaultdict
+from typing import Deque, Dict, List, Optional, Tuple, Set
+from collections import defaultdict, deque
 import random
 
 
+# Leading timestamp of a send_log.jsonl line, read without parsing the line
+TIMESTAMP_RE = re.compile(r'"timestamp":\s*"([^"]+)"')
+
+
 class SmartRateLimiter:
     """
     Intelligent rate limiter that prevents spam classification
@@ -25,6 +31,13 @@ class SmartRateLimiter:
     - Reputation scoring
     """
     
+    # Send log records buffered between flushes
+    LOG_FLUSH_EVERY = 10
+    
+    # Reputation updates are saved at most every few seconds or updates
+    REPUTATION_FLUSH_SECONDS = 5.0
+    REPUTATION_FLUSH_EVERY = 50
+    
     def __init__(self,
                  tracking_dir: str = "tracking",
                  max_hourly: int = 10,
@@ -73,39 +86,68 @@ class SmartRateLimiter:
         
         # State
         self.last_send_time: Optional[datetime] = None
-        self.send_history: List[Dict] = self._load_send_history()
+        # Sends of the last 24 hours as (epoch seconds, domain), oldest first
+        self.send_history: Deque[Tuple[float, str]] = self._load_send_history()
+        # Sliding windows of send times, built from send_history on first
+        # use and trimmed from the left on each query:
+        # hours -> times, and domain -> hours -> times
+        self._windows: Dict[int, Deque[float]] = {}
+        self._domain_windows: Dict[str, Dict[int, Deque[float]]] = defaultdict(dict)
         self.reputation: Dict = self._load_reputation()
+        self._rep_dirty = False
+        self._rep_pending = 0
+        self._rep_last_flush = time.monotonic()
+        
+        # Send log is kept open and written through a buffer
+        self._log_fp = None
+        self._log_writes = 0
+        atexit.register(self.close)
         
         print(f"✅ Smart Rate Limiter initialized:")
         print(f"   Hourly limit: {max_hourly} | Daily limit: {max_daily}")
         print(f"   Domain limits: {max_per_domain_hourly}/hr, {max_per_domain_daily}/day")
         print(f"   Delay range: {min_delay_seconds}-{max_delay_seconds}s")
     
-    def _load_send_history(self) -> List[Dict]:
+    def _load_send_history(self) -> Deque[Tuple[float, str]]:
         """Load recent send history (last 24 hours)"""
         if not self.send_log_file.exists():
-            return []
+            return deque()
         
         history = []
-        cutoff = datetime.now() - timedelta(days=1)
+        # Naive isoformat() timestamps sort as strings, so lines older than
+        # the cutoff are skipped without being parsed
+        cutoff_iso = (datetime.now() - timedelta(days=1)).isoformat()
+        latest_iso = None
         
         try:
             with open(self.send_log_file, 'r') as f:
                 for line in f:
-                    if line.strip():
+                    match = TIMESTAMP_RE.search(line)
+                    if match:
+                        record, timestamp = None, match.group(1)
+                    elif line.strip():
                         record = json.loads(line)
-                        record_time = datetime.fromisoformat(record['timestamp'])
-                        
-                        if record_time > cutoff:
-                            history.append(record)
-                            
-                        # Update last send time
-                        if not self.last_send_time or record_time > self.last_send_time:
-                            self.last_send_time = record_time
+                        timestamp = record['timestamp']
+                    else:
+                        continue
+                    
+                    # Track last send time
+                    if latest_iso is None or timestamp > latest_iso:
+                        latest_iso = timestamp
+                    
+                    if timestamp > cutoff_iso:
+                        if record is None:
+                            record = json.loads(line)
+                        record_time = datetime.fromisoformat(timestamp)
+                        history.append((record_time.timestamp(), record.get('domain', '')))
+            
+            if latest_iso is not None:
+                self.last_send_time = datetime.fromisoformat(latest_iso)
         except Exception as e:
             print(f"⚠️  Warning: Error loading send history: {e}")
         
-        return history
+        history.sort()
+        return deque(history)
     
     def _load_reputation(self) -> Dict:
         """Load sender reputation data"""
@@ -135,20 +177,37 @@ class SmartRateLimiter:
     def _log_send(self, recipient: str, domain: str, 
                   campaign_id: str, success: bool = True):
         """Log an email send"""
+        now = datetime.now()
+        now_ts = now.timestamp()
         record = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': now.isoformat(),
             'recipient': recipient,
             'domain': domain,
             'campaign_id': campaign_id,
             'success': success
         }
         
-        with open(self.send_log_file, 'a') as f:
-            json.dump(record, f)
-            f.write('\n')
+        if self._log_fp is None:
+            self._log_fp = open(self.send_log_file, 'a', buffering=64 * 1024)
+        self._log_fp.write(json.dumps(record) + '\n')
         
-        self.send_history.append(record)
-        self.last_send_time = datetime.now()
+        # Flush periodically so a crash loses at most a few records
+        self._log_writes += 1
+        if self._log_writes % self.LOG_FLUSH_EVERY == 0:
+            self._log_fp.flush()
+        
+        self.send_history.append((now_ts, domain))
+        for window in self._windows.values():
+            window.append(now_ts)
+        for window in self._domain_windows.get(domain, {}).values():
+            window.append(now_ts)
+        
+        # History only needs to cover the last 24 hours
+        cutoff = now_ts - 24 * 3600
+        while self.send_history and self.send_history[0][0] <= cutoff:
+            self.send_history.popleft()
+        
+        self.last_send_time = now
         
         # Update reputation
         self.reputation['total_sent'] = self.reputation.get('total_sent', 0) + 1
@@ -157,6 +216,7 @@ class SmartRateLimiter:
                 self.reputation.get('successful_sends', 0) + 1
         
         self._update_reputation_score()
+        self._maybe_flush_reputation()
     
     def _update_reputation_score(self):
         """Update sender reputation score (0-100)"""
@@ -177,22 +237,47 @@ class SmartRateLimiter:
         score *= success_rate
         
         self.reputation['score'] = max(0, min(100, score))
-        self._save_reputation()
+        self._rep_dirty = True
+        self._rep_pending += 1
+    
+    def _maybe_flush_reputation(self):
+        """Save reputation once enough time or updates have accumulated"""
+        if self._rep_dirty and (
+                time.monotonic() - self._rep_last_flush > self.REPUTATION_FLUSH_SECONDS
+                or self._rep_pending >= self.REPUTATION_FLUSH_EVERY):
+            self._flush_reputation()
+    
+    def _flush_reputation(self):
+        """Save reputation if it changed since the last save"""
+        if self._rep_dirty:
+            self._save_reputation()
+            self._rep_dirty = False
+            self._rep_pending = 0
+            self._rep_last_flush = time.monotonic()
+    
+    def _window(self, hours: int, domain: Optional[str] = None) -> Deque[float]:
+        """Send times (epoch seconds) in the last N hours, optionally for one domain, oldest first"""
+        windows = self._windows if domain is None else self._domain_windows[domain]
+        window = windows.get(hours)
+        if window is None:
+            window = windows[hours] = deque(
+                ts for ts, record_domain in self.send_history
+                if domain is None or record_domain == domain
+            )
+        
+        # Drop sends that have aged out of the window
+        cutoff = time.time() - hours * 3600
+        while window and window[0] <= cutoff:
+            window.popleft()
+        return window
     
     def _count_sends_in_period(self, hours: int = 1) -> int:
         """Count sends in the last N hours"""
-        cutoff = datetime.now() - timedelta(hours=hours)
-        count = sum(1 for record in self.send_history
-                   if datetime.fromisoformat(record['timestamp']) > cutoff)
-        return count
+        return len(self._window(hours))
     
     def _count_domain_sends(self, domain: str, hours: int = 24) -> int:
         """Count sends to a domain in the last N hours"""
-        cutoff = datetime.now() - timedelta(hours=hours)
-        count = sum(1 for record in self.send_history
-                   if record['domain'] == domain 
-                   and datetime.fromisoformat(record['timestamp']) > cutoff)
-        return count
+        return len(self._window(hours, domain))
     
     def _is_good_time_to_send(self) -> Tuple[bool, str]:
         """Check if current time is good for sending emails"""
@@ -291,15 +376,9 @@ class SmartRateLimiter:
         # Check hourly limit
         hourly_count = self._count_sends_in_period(hours=1)
         if hourly_count >= self.max_hourly:
-            # Find oldest send in current hour to calculate wait time
-            hour_ago = datetime.now() - timedelta(hours=1)
-            oldest_in_hour = min([
-                datetime.fromisoformat(r['timestamp'])
-                for r in self.send_history
-                if datetime.fromisoformat(r['timestamp']) > hour_ago
-            ])
-            wait_until = oldest_in_hour + timedelta(hours=1)
-            wait_seconds = int((wait_until - datetime.now()).total_seconds())
+            # Oldest send in current hour (left end of the window) sets the wait time
+            oldest_in_hour = self._window(1)[0]
+            wait_seconds = int(oldest_in_hour + 3600 - time.time())
             return False, f"Hourly limit reached ({self.max_hourly})", wait_seconds
         
         # Check per-domain hourly limit
@@ -381,14 +460,29 @@ class SmartRateLimiter:
         """Record a bounced email"""
         self.reputation['bounces'] = self.reputation.get('bounces', 0) + 1
         self._update_reputation_score()
+        self.flush()
         print(f"📛 Bounce recorded for {recipient}")
     
     def record_complaint(self, recipient: str):
         """Record a spam complaint"""
         self.reputation['complaints'] = self.reputation.get('complaints', 0) + 1
         self._update_reputation_score()
+        self.flush()
         print(f"⚠️  Complaint recorded for {recipient}")
     
+    def flush(self):
+        """Write buffered send log records and pending reputation to disk"""
+        if self._log_fp is not None:
+            self._log_fp.flush()
+        self._flush_reputation()
+    
+    def close(self):
+        """Save pending reputation, then flush and close the send log"""
+        self._flush_reputation()
+        if self._log_fp is not None:
+            self._log_fp.close()
+            self._log_fp = None
+    
     def get_stats(self) -> Dict:
         """Get comprehensive sending statistics"""
         hourly = self._count_sends_in_period(hours=1)
@@ -396,14 +490,10 @@ class SmartRateLimiter:
         
         # Count per domain
         domain_counts = defaultdict(int)
-        hour_ago = datetime.now() - timedelta(hours=1)
-        today = datetime.now().date()
+        midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
         
-        for record in self.send_history:
-            record_time = datetime.fromisoformat(record['timestamp'])
-            domain = record['domain']
-            
-            if record_time.date() == today:
+        for ts, domain in self.send_history:
+            if ts >= midnight:
                 domain_counts[domain] += 1
         
         return {